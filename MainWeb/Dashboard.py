@@ -1,9 +1,25 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
+
+from charts import program_trend_figure, trend_figures
+from freshness import DataWatcher
+from history import latest, list_partitions, program_history, snapshot_trends
+from profiling import CACHE_STATS, Profiler, profile_mode
+from ingest import DATA_FILE, RULES_FILE, STORE_FILE, load_csv, read_store, store_is_current
+from query_service import QueryService
+from recommend import DEFAULT_WEIGHTS
+from table_view import DETAIL_COLUMNS, display_table, page_count, page_slice
+
+PAGE_SIZES = [25, 50, 100]
+ACADEMIC_YEAR = 2025  # footer year when there is no history snapshot to take it from
+TOP_COLUMNS = ['university', 'program_name', 'fee/term', 'total_admission']
+WEIGHT_LABELS = {
+    'fee': 'ค่าเทอมต่ำ',
+    'total_admission': 'ที่รับรวม',
+    'r1': 'รอบ1',
+    'r2': 'รอบ2',
+    'r3': 'รอบ3',
+    'r4': 'รอบ4',
+}
 
 # Page configuration
 st.set_page_config(
@@ -38,51 +54,60 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+def load_source():
+    """Load the cleaned, typed table from the Arrow store, falling back to cleaning MainData.csv"""
+    if store_is_current():
+        return read_store()
+    return load_csv()
+
+def prepare_resources(df):
+    """Per-version query service (indexes and result caches), built before the new data is swapped in"""
+    return {'service': QueryService(df)}
+
+@st.cache_resource
+def load_watcher():
+    """One background watcher per process; it hot-reloads the data files when a crawl rewrites them"""
+    CACHE_STATS.miss('load_data')
+    return DataWatcher([DATA_FILE, RULES_FILE, STORE_FILE], load_source, prepare_resources)
+
 def load_data():
-    """Load and process the university data"""
-    # Read the CSV file
-    df = pd.read_csv('MainData.csv')
-    
-    # Clean column names
-    df.columns = df.columns.str.strip()
-    
-    # Convert fee to numeric, handling any formatting issues
-    df['fee/term'] = pd.to_numeric(df['fee/term'], errors='coerce')
-    
-    # Convert admission rounds to numeric, replacing '-' with 0
-    admission_cols = ['r1', 'r2', 'r3', 'r4']
-    for col in admission_cols:
-        df[col] = df[col].replace('-', 0)
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    # Calculate total admission slots
-    df['total_admission'] = df[admission_cols].sum(axis=1)
-    
-    # Categorize universities by type
-    def categorize_university(name):
-        if 'จุฬาลงกรณ์' in name or 'เกษตรศาสตร์' in name or 'เชียงใหม่' in name or 'ขอนแก่น' in name or 'สงขลานครินทร์' in name:
-            return 'มหาวิทยาลัยชั้นนำ'
-        elif 'เทคโนโลยี' in name or 'สถาบัน' in name:
-            return 'สถาบันเทคโนโลยี'
-        elif 'ราชภัฏ' in name or 'รามคำแหง' in name:
-            return 'มหาวิทยาลัยราชภัฏ/เปิด'
-        else:
-            return 'มหาวิทยาลัยเอกชน'
-    
-    df['university_type'] = df['university'].apply(categorize_university)
-    
-    return df
+    """The current data snapshot (df, version, load time and its indexes/caches)"""
+    CACHE_STATS.call('load_data')
+    return load_watcher().current
+
+@st.cache_data
+def load_trends(partitions):
+    """Per-snapshot trend table; partitions is part of the cache key so a new snapshot refreshes it"""
+    return snapshot_trends()
+
+@st.cache_data
+def load_latest_programs(partitions):
+    """Program keys and labels from the newest snapshot for the trend picker"""
+    programs = latest(columns=['program_key', 'university', 'program_name'])
+    programs['label'] = programs['university'].str.strip() + ' - ' + programs['program_name'].str.strip()
+    return programs.sort_values('label')
+
+@st.cache_data
+def load_program_history(partitions, key):
+    return program_history(key, columns=['fee/term', 'r1', 'r2', 'r3', 'r4', 'total_admission'])
 
 def main():
+    profiler = Profiler(profile_mode())
     st.markdown('<h1 class="main-header">🎓 Thai University Computer Engineering Dashboard</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; font-size: 1.2rem; color: #666;">เลือกมหาวิทยาลัยที่เหมาะกับคุณ สำหรับปีการศึกษาถัดไป</p>', unsafe_allow_html=True)
     
     # Load data
-    df = load_data()
+    data = load_data()
+    df = data.df
+    service = data.resources['service']
+    profiler.lap('load_data')
     
     # Sidebar filters
     st.sidebar.header("🔍 ตัวกรองข้อมูล")
+    st.sidebar.caption(
+        f"ข้อมูลเวอร์ชัน {data.version} · แก้ไขไฟล์ {data.modified_at:%Y-%m-%d %H:%M} · "
+        f"โหลดเมื่อ {data.loaded_at:%H:%M:%S}"
+    )
     
     # Fee range filter
     min_fee, max_fee = st.sidebar.slider(
@@ -96,8 +121,8 @@ def main():
     # University type filter
     university_types = st.sidebar.multiselect(
         "ประเภทมหาวิทยาลัย",
-        options=df['university_type'].unique(),
-        default=df['university_type'].unique()
+        options=df['university_type'].unique().tolist(),
+        default=df['university_type'].unique().tolist()
     )
     
     # Minimum admission slots filter
@@ -107,14 +132,17 @@ def main():
         max_value=int(df['total_admission'].max()),
         value=0
     )
+    profiler.lap('sidebar')
     
-    # Filter data
-    filtered_df = df[
-        (df['fee/term'] >= min_fee) & 
-        (df['fee/term'] <= max_fee) &
-        (df['university_type'].isin(university_types)) &
-        (df['total_admission'] >= min_admission)
-    ]
+    # Filter data through the shared query service: index lookups cached per filter state,
+    # so sessions hold row positions rather than their own filtered copies of the frame
+    filters = (min_fee, max_fee, university_types, min_admission)
+    filtered_rows = service.filter(*filters)
+    profiler.lap('filter')
+    
+    # All metrics, chart totals and insights come from one aggregation pass, memoized per filter state
+    agg = service.aggregate(*filters)
+    profiler.lap('aggregates')
     
     # Main dashboard
     col1, col2, col3, col4 = st.columns(4)
@@ -122,12 +150,12 @@ def main():
     with col1:
         st.metric(
             label="📚 จำนวนหลักสูตร",
-            value=len(filtered_df),
-            delta=f"{len(filtered_df)}/{len(df)} หลักสูตร"
+            value=agg['count'],
+            delta=f"{agg['count']}/{len(df)} หลักสูตร"
         )
     
     with col2:
-        avg_fee = filtered_df['fee/term'].mean()
+        avg_fee = agg['avg_fee']
         st.metric(
             label="💰 ค่าเทอมเฉลี่ย",
             value=f"฿{avg_fee:,.0f}",
@@ -135,7 +163,7 @@ def main():
         )
     
     with col3:
-        total_slots = filtered_df['total_admission'].sum()
+        total_slots = agg['total_slots']
         st.metric(
             label="🎯 ที่รับทั้งหมด",
             value=f"{total_slots:,}",
@@ -143,106 +171,97 @@ def main():
         )
     
     with col4:
-        avg_slots = filtered_df['total_admission'].mean()
+        avg_slots = agg['avg_slots']
         st.metric(
             label="📊 ที่รับเฉลี่ย/หลักสูตร",
             value=f"{avg_slots:.0f}",
             delta="คน"
         )
     
+    profiler.lap('metrics')
+    
     # Charts section
     st.markdown("---")
     
-    # Fee vs Admission Analysis
+    # Fee vs Admission Analysis (figures are built once per filter state and reused)
+    charts = service.chart_figures(*filters)
+    profiler.lap('charts_build')
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💰 การกระจายค่าเทอมตามประเภทมหาวิทยาลัย")
         
-        fig_box = px.box(
-            filtered_df, 
-            x='university_type', 
-            y='fee/term',
-            color='university_type',
-            title="ช่วงค่าเทอมแต่ละประเภทมหาวิทยาลัย"
-        )
-        fig_box.update_layout(
-            xaxis_title="ประเภทมหาวิทยาลัย",
-            yaxis_title="ค่าเทอม (บาท)",
-            showlegend=False
-        )
-        fig_box.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_box, use_container_width=True)
+        st.plotly_chart(charts['box'], use_container_width=True)
     
     with col2:
         st.subheader("🎯 จำนวนที่รับแต่ละรอบ")
-        
-        # Prepare data for admission rounds
-        admission_data = filtered_df[['r1', 'r2', 'r3', 'r4']].sum()
-        
-        fig_pie = px.pie(
-            values=admission_data.values,
-            names=['รอบที่ 1', 'รอบที่ 2', 'รอบที่ 3', 'รอบที่ 4'],
-            title="สัดส่วนการรับนักศึกษาแต่ละรอบ"
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(charts['pie'], use_container_width=True)
     
     # Scatter plot: Fee vs Total Admission
     st.subheader("📈 ความสัมพันธ์ระหว่างค่าเทอมและจำนวนที่รับ")
-    
-    fig_scatter = px.scatter(
-        filtered_df,
-        x='fee/term',
-        y='total_admission',
-        color='university_type',
-        size='total_admission',
-        hover_data=['university', 'program_name'],
-        title="ค่าเทอม vs จำนวนที่รับ (ขนาดจุด = จำนวนที่รับ)"
-    )
-    fig_scatter.update_layout(
-        xaxis_title="ค่าเทอม (บาท)",
-        yaxis_title="จำนวนที่รับรวม (คน)"
-    )
-    st.plotly_chart(fig_scatter, use_container_width=True)
+    st.plotly_chart(charts['scatter'], use_container_width=True)
+    if charts['scatter_note']:
+        st.caption(charts['scatter_note'])
+    profiler.lap('charts_render')
     
     # Top universities by different criteria
     st.markdown("---")
     st.subheader("🏆 อันดับมหาวิทยาลัย")
     
-    tab1, tab2 = st.tabs(["💰 ค่าเทอมต่ำสุด", "🎯 รับมากที่สุด"])
+    tab1, tab2, tab3 = st.tabs(["💰 ค่าเทอมต่ำสุด", "🎯 รับมากที่สุด", "✨ แนะนำตามน้ำหนักที่เลือก"])
     
     with tab1:
-        cheapest = filtered_df.nsmallest(10, 'fee/term')[['university', 'program_name', 'fee/term', 'total_admission']]
-        cheapest['fee/term'] = cheapest['fee/term'].apply(lambda x: f"฿{x:,.0f}")
-        st.dataframe(cheapest, use_container_width=True, hide_index=True)
+        cheapest = df.iloc[service.top('cheapest', 10, *filters)]
+        st.dataframe(display_table(cheapest, TOP_COLUMNS), use_container_width=True, hide_index=True)
     
     with tab2:
-        most_admission = filtered_df.nlargest(10, 'total_admission')[['university', 'program_name', 'fee/term', 'total_admission']]
-        most_admission['fee/term'] = most_admission['fee/term'].apply(lambda x: f"฿{x:,.0f}")
-        st.dataframe(most_admission, use_container_width=True, hide_index=True)
+        most_admission = df.iloc[service.top('most_admission', 10, *filters)]
+        st.dataframe(display_table(most_admission, TOP_COLUMNS), use_container_width=True, hide_index=True)
+    
+    with tab3:
+        # Weighted score over the filtered programs; top-K is cached per weight vector and filter state
+        weight_cols = st.columns(len(WEIGHT_LABELS))
+        weights = {
+            name: col.slider(label, min_value=0, max_value=10, value=int(DEFAULT_WEIGHTS[name] * 5), key=f"weight_{name}")
+            for col, (name, label) in zip(weight_cols, WEIGHT_LABELS.items())
+        }
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            preferred_type = st.selectbox("ประเภทที่ต้องการ", options=["ไม่ระบุ"] + sorted(university_types))
+        with col2:
+            type_weight = st.slider("น้ำหนักประเภท", min_value=0, max_value=10, value=5,
+                                    disabled=preferred_type == "ไม่ระบุ")
+        with col3:
+            top_k = st.number_input("จำนวนหลักสูตร", min_value=1, max_value=50, value=10)
+        
+        type_weights = {} if preferred_type == "ไม่ระบุ" else {preferred_type: type_weight}
+        recommended, scores = service.recommend(weights, type_weights, top_k, *filters)
+        table = display_table(df.iloc[recommended], TOP_COLUMNS + ['university_type'])
+        table.insert(0, 'คะแนน', (scores * 100).round(1))
+        st.dataframe(table, use_container_width=True, hide_index=True)
+    
+    profiler.lap('rankings')
     
     # Detailed university table
     st.markdown("---")
     st.subheader("📋 ตารางข้อมูลรายละเอียด")
     
-    # Prepare display dataframe
-    display_df = filtered_df[['university', 'faculty', 'program_name', 'fee/term', 'r1', 'r2', 'r3', 'r4', 'total_admission', 'university_type']].copy()
-    display_df['fee/term'] = display_df['fee/term'].apply(lambda x: f"฿{x:,.0f}")
-    display_df = display_df.rename(columns={
-        'university': 'มหาวิทยาลัย',
-        'faculty': 'คณะ',
-        'program_name': 'หลักสูตร',
-        'fee/term': 'ค่าเทอม',
-        'r1': 'รอบ1',
-        'r2': 'รอบ2', 
-        'r3': 'รอบ3',
-        'r4': 'รอบ4',
-        'total_admission': 'รวม',
-        'university_type': 'ประเภท'
-    })
+    # Sort on the server and format only the visible page, so the payload depends on the page size
+    sort_labels = {label: col for col, label in DETAIL_COLUMNS.items()}
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_label = st.selectbox("เรียงตาม", options=list(sort_labels), index=list(sort_labels).index('ค่าเทอม'))
+    with col2:
+        descending = st.radio("ลำดับ", options=["น้อยไปมาก", "มากไปน้อย"], horizontal=True) == "มากไปน้อย"
+    with col3:
+        page_size = st.selectbox("แถวต่อหน้า", options=PAGE_SIZES, index=0)
+    
+    sorted_rows = service.sorted_rows(filtered_rows, sort_labels[sort_label], descending)
+    pages = page_count(len(sorted_rows), page_size)
+    page = st.number_input(f"หน้า (ทั้งหมด {pages} หน้า, {len(sorted_rows)} แถว)", min_value=1, max_value=pages, value=1)
     
     st.dataframe(
-        display_df,
+        display_table(df.iloc[page_slice(sorted_rows, page, page_size)]),
         use_container_width=True,
         hide_index=True,
         column_config={
@@ -251,6 +270,8 @@ def main():
         }
     )
     
+    profiler.lap('detail_table')
+    
     # Summary insights
     st.markdown("---")
     st.subheader("💡 ข้อมูลเชิงลึก")
@@ -260,39 +281,79 @@ def main():
     with col1:
         st.markdown("### 🎯 สำหรับนักเรียนที่เตรียมสมัคร:")
         # Find round with minimum admission
-        round_sums = filtered_df[['r1', 'r2', 'r3', 'r4']].sum()
-        min_round_col = round_sums.idxmin()
+        round_sums = agg['round_sums']
+        min_round_col = agg['min_round']
         round_number = min_round_col[-1]  # Get the number from 'r1', 'r2', etc.
         
         insights = f"""
-        - **มหาวิทยาลัยที่มีค่าเทอมต่ำสุด:** {filtered_df.loc[filtered_df['fee/term'].idxmin(), 'university']} (฿{filtered_df['fee/term'].min():,.0f})
-        - **มหาวิทยาลัยที่รับมากที่สุด:** {filtered_df.loc[filtered_df['total_admission'].idxmax(), 'university']} ({filtered_df['total_admission'].max()} คน)
-        - **รอบที่มีที่รับน้อยที่สุด:** รอบที่ {round_number} ({round_sums.min()} คน)
-        - **ช่วงราคาที่พบมาก:** ฿{filtered_df['fee/term'].quantile(0.25):,.0f} - ฿{filtered_df['fee/term'].quantile(0.75):,.0f}
+        - **มหาวิทยาลัยที่มีค่าเทอมต่ำสุด:** {agg['cheapest_university'] or '-'} (฿{agg['min_fee']:,.0f})
+        - **มหาวิทยาลัยที่รับมากที่สุด:** {agg['most_admission_university'] or '-'} ({agg['max_admission']} คน)
+        - **รอบที่มีที่รับน้อยที่สุด:** รอบที่ {round_number} ({round_sums[min_round_col]} คน)
+        - **ช่วงราคาที่พบมาก:** ฿{agg['fee_q25']:,.0f} - ฿{agg['fee_q75']:,.0f}
         """
         st.markdown(insights)
     
     with col2:
         st.markdown("### 📊 สถิติที่น่าสนใจ:")
         stats = f"""
-        - **จำนวนมหาวิทยาลัยรัฐ:** {len(filtered_df[filtered_df['university_type'].isin(['มหาวิทยาลัยชั้นนำ', 'สถาบันเทคโนโลยี', 'มหาวิทยาลัยราชภัฏ/เปิด'])])} แห่ง
-        - **จำนวนมหาวิทยาลัยเอกชน:** {len(filtered_df[filtered_df['university_type'] == 'มหาวิทยาลัยเอกชน'])} แห่ง
-        - **ค่าเทอมเฉลี่ยรัฐ:** ฿{filtered_df[filtered_df['university_type'] != 'มหาวิทยาลัยเอกชน']['fee/term'].mean():,.0f}
-        - **ค่าเทอมเฉลี่ยเอกชน:** ฿{filtered_df[filtered_df['university_type'] == 'มหาวิทยาลัยเอกชน']['fee/term'].mean():,.0f}
+        - **จำนวนมหาวิทยาลัยรัฐ:** {agg['state_count']} แห่ง
+        - **จำนวนมหาวิทยาลัยเอกชน:** {agg['private_count']} แห่ง
+        - **ค่าเทอมเฉลี่ยรัฐ:** ฿{agg['state_avg_fee']:,.0f}
+        - **ค่าเทอมเฉลี่ยเอกชน:** ฿{agg['private_avg_fee']:,.0f}
         """
         st.markdown(stats)
 
+    profiler.lap('insights')
+
+    # History trends (one partition per crawl; cached until a new snapshot appears)
+    st.markdown("---")
+    st.subheader("📈 แนวโน้มย้อนหลัง")
+    partitions = tuple(list_partitions())
+    if not partitions:
+        st.info("ยังไม่มีข้อมูลย้อนหลัง (บันทึกได้ด้วย python history.py snapshot หลังดึงข้อมูลแต่ละครั้ง)")
+    else:
+        tab1, tab2 = st.tabs(["📊 ภาพรวมตามประเภท", "🔎 รายหลักสูตร"])
+        
+        with tab1:
+            fig_fee, fig_quota = trend_figures(load_trends(partitions))
+            st.plotly_chart(fig_fee, use_container_width=True)
+            st.plotly_chart(fig_quota, use_container_width=True)
+        
+        with tab2:
+            programs = load_latest_programs(partitions)
+            key = st.selectbox(
+                "หลักสูตร",
+                options=programs['program_key'].tolist(),
+                format_func=dict(zip(programs['program_key'], programs['label'])).get
+            )
+            if key:
+                st.plotly_chart(program_trend_figure(load_program_history(partitions, key)), use_container_width=True)
+
+    profiler.lap('trends')
+
     # Footer
     st.markdown("---")
+    academic_year = partitions[-1][0] if partitions else ACADEMIC_YEAR
     st.markdown(
-        """
+        f"""
         <div style='text-align: center; color: #666;'>
-            <p>📚 ข้อมูลสำหรับการตัดสินใจเลือกเรียนต่อ | 🎓 ปีการศึกษา 2025</p>
+            <p>📚 ข้อมูลสำหรับการตัดสินใจเลือกเรียนต่อ | 🎓 ปีการศึกษา {academic_year}</p>
             <p><small>หมายเหตุ: ข้อมูลอาจมีการเปลี่ยนแปลง กรุณาตรวจสอบกับมหาวิทยาลัยโดยตรง</small></p>
         </div>
         """, 
         unsafe_allow_html=True
     )
+    profiler.lap('footer')
+
+    profiler.finish(
+        caches=service.caches(),
+        data_version=data.version,
+        rows=len(df),
+        filtered_rows=len(filtered_rows),
+        filters={'min_fee': min_fee, 'max_fee': max_fee, 'university_types': university_types, 'min_admission': min_admission},
+        data_reloads=load_watcher().reloads,
+        query_latency=service.latency.summary(),
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,14 +1,26 @@
+import argparse
 import asyncio
 import csv
+from functools import partial
 from playwright.async_api import async_playwright
 
+import checkpoint as ckpt
+import normalize_fee
+import scheduler as sched
+from pool import TrafficStats, browser_page, run_pool
+
 async def scrape_fee(page, program_url):
     """
     เข้าไปหน้า program_url แล้วดึงค่าใช้จ่ายของหลักสูตร
     """
-    await page.goto(program_url)
+    await page.goto(program_url, wait_until="domcontentloaded")
     await page.wait_for_selector("dl", timeout=10000)
+    return await extract_fee(page)
 
+async def extract_fee(page):
+    """
+    ดึงค่าใช้จ่ายจากหน้าหลักสูตรที่โหลดไว้แล้ว
+    """
     # หา element <dt> ที่มีข้อความ "ค่าใช้จ่าย"
     dt_elements = await page.query_selector_all("dl dt")
     for dt in dt_elements:
@@ -20,9 +32,35 @@ async def scrape_fee(page, program_url):
                 return fee_text
     return "ไม่พบข้อมูล"
 
-async def main():
-    input_file = "programs_engineering.csv"  
+def fee_row(row, fee):
+    return {
+        "university": row["university"],
+        "faculty": row["faculty"],
+        "field_name": row["field_name"],
+        "program_name": row["program_name"],
+        "fee": fee
+    }
+
+async def scrape_row(page, row, checkpoint=None):
+    """
+    ดึงค่าใช้จ่ายของหลักสูตรหนึ่งแถว แล้วคืน dict สำหรับเขียนลง CSV
+    ถ้าดึงสำเร็จจะบันทึกลง checkpoint ทันที (ถ้า error จะส่ง exception ให้ scheduler ลองใหม่)
+    """
+    print(f"ดึงค่าใช้จ่าย: {row['university']} | {row['program_name']}")
+
+    result = fee_row(row, await scrape_fee(page, row["program_url"]))
+    if checkpoint is not None:
+        checkpoint.save(row["program_url"], result)
+    return result
+
+def failed_row(row, error):
+    return fee_row(row, "ไม่สามารถดึงข้อมูลได้")
+
+async def main(scheduler, checkpoint_file="programs_with_fee.checkpoint.db", refresh_older_than=None,
+               block=True):
+    input_file = "programs_engineering.csv"
     output_file = "programs_with_fee.csv"
+    normalized_file = "programs_with_fee.normalized.csv"
 
     rows = []
     with open(input_file, newline="", encoding="utf-8") as f:
@@ -30,35 +68,22 @@ async def main():
         for r in reader:
             rows.append(r)
 
+    checkpoint = ckpt.Checkpoint(checkpoint_file)
+    pending = ckpt.pending_rows(rows, checkpoint, refresh_older_than)
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
-        results = []
-        for row in rows:
-            university = row["university"]
-            faculty = row["faculty"]
-            field_name = row["field_name"]
-            program_name = row["program_name"]
-            program_url = row["program_url"]
-
-            print(f"ดึงค่าใช้จ่าย: {university} | {program_name}")
-
-            try:
-                fee = await scrape_fee(page, program_url)
-            except Exception as e:
-                print(f"Error: {e}")
-                fee = "ไม่สามารถดึงข้อมูลได้"
-
-            results.append({
-                "university": university,
-                "faculty": faculty,
-                "field_name": field_name,
-                "program_name": program_name,
-                "fee": fee
-            })
+
+        # แต่ละ page ทำงานพร้อมกัน แต่ results ยังเรียงตามลำดับใน input_file
+        stats = TrafficStats()
+        results = await run_pool(partial(browser_page, browser, stats, block), pending,
+                                 partial(scrape_row, checkpoint=checkpoint), scheduler, failed_row)
 
         await browser.close()
+    stats.report(len(pending))
+
+    results = ckpt.ordered_results(rows, pending, results, checkpoint)
+    checkpoint.close()
 
     # เขียนไฟล์ CSV ใหม่ โดยแทน program_url ด้วยค่าใช้จ่าย
     with open(output_file, "w", newline="", encoding="utf-8") as f:
@@ -69,4 +94,21 @@ async def main():
 
     print(f"เสร็จสิ้น บันทึกไฟล์ {output_file}")
 
-asyncio.run(main())
+    # แปลงข้อความค่าใช้จ่ายเป็นจำนวนเงิน/หน่วย/สกุลเงิน แถวที่แปลงไม่ได้แยกไปรายงาน
+    rejected = []
+    count = normalize_fee.write_csv(normalize_fee.normalize_rows(results, rejected), normalized_file,
+                                    fieldnames + normalize_fee.OUTPUT_FIELDS)
+    print(f"แปลงค่าใช้จ่ายได้ {count} แถว บันทึกไฟล์ {normalized_file}")
+    normalize_fee.report(rejected, "programs_with_fee.rejected.csv")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ดึงค่าใช้จ่ายของหลักสูตรจาก course.mytcas.com")
+    sched.add_arguments(parser)
+    parser.add_argument("--no-block", action="store_true",
+                        help="ให้ browser โหลดรูป ฟอนต์ CSS และสคริปต์ analytics ด้วย (ค่าเริ่มต้น บล็อก)")
+    ckpt.add_arguments(parser, "programs_with_fee.checkpoint.db")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(main(sched.from_args(args), args.checkpoint, args.refresh_older_than, not args.no_block))
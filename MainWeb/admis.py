@@ -1,11 +1,22 @@
+import argparse
 import asyncio
 import csv
+from functools import partial
 from playwright.async_api import async_playwright
 
+import checkpoint as ckpt
+import scheduler as sched
+from pool import TrafficStats, browser_page, run_pool
+
 async def scrape_rounds(page, url):
-    await page.goto(url)
+    await page.goto(url, wait_until="domcontentloaded")
     await page.wait_for_selector("ul.body.t-program")
+    return await extract_rounds(page)
 
+async def extract_rounds(page):
+    """
+    ดึงจำนวนที่รับรอบ r1-r4 จากหน้าหลักสูตรที่โหลดไว้แล้ว
+    """
     rounds = {"r1": "-", "r2": "-", "r3": "-", "r4": "-"}
 
     for r in rounds.keys():
@@ -28,7 +39,35 @@ async def scrape_rounds(page, url):
 
     return rounds
 
-async def main():
+def rounds_row(row, rounds):
+    return {
+        "university": row["university"],
+        "faculty": row["faculty"],
+        "field_name": row["field_name"],
+        "program_name": row["program_name"],
+        "r1": rounds["r1"],
+        "r2": rounds["r2"],
+        "r3": rounds["r3"],
+        "r4": rounds["r4"],
+    }
+
+async def scrape_row(page, row, checkpoint=None):
+    print(f"กำลังดึงข้อมูล: {row['program_name']}")
+    rounds = await scrape_rounds(page, row["program_url"])
+    print(f"ผลลัพธ์: {rounds}")  # Debug ดูค่าที่ดึงได้
+
+    result = rounds_row(row, rounds)
+    # บันทึกทันที ถ้ารันพังกลางทางจะไม่เสียแถวที่ดึงมาแล้ว
+    if checkpoint is not None:
+        checkpoint.save(row["program_url"], result)
+    return result
+
+def failed_row(row, error):
+    # timeout ของ wait_for_selector หลัง retry ครบแล้ว ไม่ให้ทั้งรอบหยุด
+    return rounds_row(row, {"r1": "-", "r2": "-", "r3": "-", "r4": "-"})
+
+async def main(scheduler, checkpoint_file="programs_with_rounds.checkpoint.db", refresh_older_than=None,
+               block=True):
     input_file = "programs_engineering.csv"   # ไฟล์ input ที่มี program_url
     output_file = "programs_with_rounds.csv"  # ไฟล์ output
 
@@ -36,28 +75,19 @@ async def main():
         reader = csv.DictReader(f)
         rows = list(reader)
 
+    checkpoint = ckpt.Checkpoint(checkpoint_file)
+    pending = ckpt.pending_rows(rows, checkpoint, refresh_older_than)
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
-        results = []
-        for row in rows:
-            print(f"กำลังดึงข้อมูล: {row['program_name']}")
-            rounds = await scrape_rounds(page, row["program_url"])
-            print(f"ผลลัพธ์: {rounds}")  # Debug ดูค่าที่ดึงได้
-
-            results.append({
-                "university": row["university"],
-                "faculty": row["faculty"],
-                "field_name": row["field_name"],
-                "program_name": row["program_name"],
-                "r1": rounds["r1"],
-                "r2": rounds["r2"],
-                "r3": rounds["r3"],
-                "r4": rounds["r4"],
-            })
-
+        stats = TrafficStats()
+        results = await run_pool(partial(browser_page, browser, stats, block), pending,
+                                 partial(scrape_row, checkpoint=checkpoint), scheduler, failed_row)
         await browser.close()
+    stats.report(len(pending))
+
+    results = ckpt.ordered_results(rows, pending, results, checkpoint)
+    checkpoint.close()
 
     with open(output_file, "w", newline="", encoding="utf-8") as f:
         fieldnames = ["university", "faculty", "field_name", "program_name", "r1", "r2", "r3", "r4"]
@@ -67,4 +97,14 @@ async def main():
 
     print(f"บันทึกไฟล์เสร็จ: {output_file}")
 
-asyncio.run(main())
+def parse_args():
+    parser = argparse.ArgumentParser(description="ดึงจำนวนที่รับแต่ละรอบของหลักสูตรจาก course.mytcas.com")
+    sched.add_arguments(parser)
+    parser.add_argument("--no-block", action="store_true",
+                        help="ให้ browser โหลดรูป ฟอนต์ CSS และสคริปต์ analytics ด้วย (ค่าเริ่มต้น บล็อก)")
+    ckpt.add_arguments(parser, "programs_with_rounds.checkpoint.db")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(main(sched.from_args(args), args.checkpoint, args.refresh_older_than, not args.no_block))
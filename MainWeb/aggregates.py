@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+ROUND_COLS = ['r1', 'r2', 'r3', 'r4']
+PRIVATE_TYPE = 'มหาวิทยาลัยเอกชน'
+
+def _sum_by_type(codes, values, k):
+    """Per-type sums in one bincount; integer columns stay integers"""
+    sums = np.bincount(codes, weights=values, minlength=k)
+    if np.issubdtype(values.dtype, np.integer):
+        sums = np.rint(sums).astype(np.int64)
+    return sums
+
+def compute_aggregates(df):
+    """
+    Every number the metrics, pie chart and insight sections need, from one grouped pass:
+    per-type counts and sums are built with bincount, and the overall and state/private
+    figures are derived from that table instead of re-filtering the frame.
+    """
+    codes, types = pd.factorize(df['university_type'].astype(str))
+    k = len(types)
+
+    fee = df['fee/term'].to_numpy(dtype=float)
+    has_fee = ~np.isnan(fee)
+    admission = df['total_admission'].to_numpy()
+
+    by_type = pd.DataFrame({
+        'count': np.bincount(codes, minlength=k),
+        'fee_sum': np.bincount(codes, weights=np.where(has_fee, fee, 0.0), minlength=k),
+        'fee_count': np.bincount(codes, weights=has_fee, minlength=k),
+        'admission': _sum_by_type(codes, admission, k),
+        **{col: _sum_by_type(codes, df[col].to_numpy(), k) for col in ROUND_COLS},
+    }, index=pd.Index(types, name='university_type'))
+
+    private = by_type.index == PRIVATE_TYPE
+    state_rows, private_rows = by_type[~private], by_type[private]
+
+    def mean_fee(rows):
+        fee_count = rows['fee_count'].sum()
+        return rows['fee_sum'].sum() / fee_count if fee_count else np.nan
+
+    count = int(by_type['count'].sum())
+    total_slots = by_type['admission'].sum()
+    round_sums = by_type[ROUND_COLS].sum()
+
+    aggregates = {
+        'by_type': by_type,
+        'count': count,
+        'avg_fee': mean_fee(by_type),
+        'total_slots': total_slots,
+        'avg_slots': total_slots / count if count else np.nan,
+        'round_sums': round_sums,
+        'min_round': round_sums.idxmin(),
+        'state_count': int(state_rows['count'].sum()),
+        'private_count': int(private_rows['count'].sum()),
+        'state_avg_fee': mean_fee(state_rows),
+        'private_avg_fee': mean_fee(private_rows),
+        'cheapest_university': None,
+        'min_fee': np.nan,
+        'most_admission_university': None,
+        'max_admission': np.nan,
+        'fee_q25': np.nan,
+        'fee_q75': np.nan,
+    }
+
+    if has_fee.any():
+        cheapest = np.nanargmin(fee)
+        aggregates['cheapest_university'] = df['university'].iat[cheapest]
+        aggregates['min_fee'] = fee[cheapest]
+        aggregates['fee_q25'], aggregates['fee_q75'] = np.nanquantile(fee, [0.25, 0.75])
+
+    if count:
+        most = int(np.argmax(admission))
+        aggregates['most_admission_university'] = df['university'].iat[most]
+        aggregates['max_admission'] = admission[most]
+
+    return aggregates
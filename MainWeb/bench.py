@@ -0,0 +1,225 @@
+"""
+วัดประสิทธิภาพ crawler กับหน้าที่บันทึกไว้ โดยไม่ยิงเว็บจริง
+
+    python fixture_server.py save                                     # หน้าหลักสูตร (crawl)
+    python fixture_server.py save-site --input universities_list.csv  # หน้ามหาวิทยาลัย/คณะ/สาขา (discover)
+    python bench.py --target http --target browser --latency 0.1 --error-rate 0.05 --output bench.json
+
+เซิร์ฟเวอร์จาก fixture_server.py รันใน thread ของโปรเซสนี้ ผลแต่ละ target มี pages/sec,
+latency ต่อหน้า p50/p95/p99, RSS สูงสุดของโปรเซสนี้รวมโปรเซสลูก และจำนวนโปรเซส browser สูงสุด
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import resource
+import threading
+import time
+from datetime import datetime
+
+import scheduler as sched
+from fixture_server import serve
+
+TARGETS = ["http", "browser", "discover"]
+
+
+def percentile(values, q):
+    """nearest-rank percentile (q เป็น 0-100) ของ values ที่ยังไม่ได้เรียง"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class ProcessSampler:
+    """
+    สุ่มวัด RSS รวมของโปรเซสนี้และโปรเซสลูกทั้งหมด (รวม Chromium ที่ Playwright เปิด) ทุก interval วินาที
+    อ่านจาก /proc; ถ้าไม่มี /proc (เช่น macOS) ใช้ค่าสูงสุดของโปรเซสนี้จาก getrusage และไม่นับ browser
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_browsers = 0 if os.path.isdir("/proc") else None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def _descendants(self):
+        children = {}
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "rb") as f:
+                    # ชื่อโปรเซสอยู่ในวงเล็บและอาจมีช่องว่าง จึงแยกหลังวงเล็บปิดตัวสุดท้าย
+                    ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(name))
+        pids, stack = [], [os.getpid()]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(children.get(pid, []))
+        return pids
+
+    def sample(self):
+        if self.peak_browsers is None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak_rss = max(self.peak_rss, rss if platform.system() == "Darwin" else rss * 1024)
+            return
+        rss = browsers = 0
+        for pid in self._descendants():
+            try:
+                with open(f"/proc/{pid}/statm", "rb") as f:
+                    rss += int(f.read().split()[1]) * self._page_size
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    browsers += b"chrom" in f.read().lower()
+            except (OSError, IndexError, ValueError):
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_browsers = max(self.peak_browsers, browsers)
+
+
+class TimedClient:
+    """ห่อ httpx client ให้จดเวลาของแต่ละ get (discover.py ไม่ได้ผ่าน Scheduler)"""
+
+    def __init__(self, client):
+        self.client = client
+        self.latencies = []
+
+    async def get(self, url, **kwargs):
+        start = time.monotonic()
+        response = await self.client.get(url, **kwargs)
+        self.latencies.append(time.monotonic() - start)
+        return response
+
+
+async def run_crawl(backend, rows, scheduler, base_url, block):
+    from crawl import crawl
+
+    await crawl(rows, scheduler, backend, base_url, block=block)
+    return len(rows), scheduler.latencies
+
+
+async def run_discover(universities, base_url, concurrency, scheduler):
+    from discover import Discovery
+    from fetch_http import new_client
+
+    limits = {"university": concurrency, "faculty": concurrency, "field": concurrency}
+    async with new_client(sum(limits.values())) as client:
+        timed = TimedClient(client)
+        discovery = Discovery(timed, limits, [], [], base_url, scheduler)
+        await discovery.run(universities)
+    return sum(discovery.pages.values()), timed.latencies
+
+
+def bench(target, args, base_url, server):
+    """รัน target หนึ่งครั้ง คืนผลเป็น dict สำหรับเขียน JSON"""
+    requests_before, errors_before = server.counts["requests"], server.counts["errors"]
+    scheduler = sched.from_args(args)
+
+    with ProcessSampler(args.sample_interval) as sampler:
+        start = time.perf_counter()
+        if target == "discover":
+            with open(args.universities, newline="", encoding="utf-8") as f:
+                universities = list(csv.DictReader(f))[:args.limit]
+            pages, latencies = asyncio.run(run_discover(universities, base_url, args.concurrency, scheduler))
+        else:
+            with open(args.input, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))[:args.limit] * args.repeat
+            pages, latencies = asyncio.run(run_crawl(target, rows, scheduler, base_url, not args.no_block))
+        elapsed = time.perf_counter() - start
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "target": target,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(max(latencies, default=None)),
+        },
+        "peak_rss_mb": round(sampler.peak_rss / 2 ** 20, 1),
+        "peak_browser_processes": sampler.peak_browsers,
+        "server_requests": server.counts["requests"] - requests_before,
+        "injected_errors": server.counts["errors"] - errors_before,
+        "retries": scheduler.retries,
+        "failures": scheduler.failures,
+        "peak_concurrency": scheduler.limit.peak if target != "discover" else None,
+    }
+
+
+def main(args):
+    server = serve(args.root, port=0, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, seed=args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = []
+    try:
+        for target in args.target or ["http"]:
+            result = bench(target, args, base_url, server)
+            results.append(result)
+            latency = result["latency_ms"]
+            print(f"[{target}] {result['pages']} หน้า {result['pages_per_sec']} หน้า/วินาที "
+                  f"p50 {latency['p50']} ms p95 {latency['p95']} ms p99 {latency['p99']} ms "
+                  f"RSS สูงสุด {result['peak_rss_mb']} MB browser {result['peak_browser_processes']} โปรเซส")
+    finally:
+        server.shutdown()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"บันทึกผลที่ {args.output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="วัดความเร็วและการใช้ทรัพยากรของ crawler กับ fixture_server.py")
+    parser.add_argument("--target", action="append", choices=TARGETS,
+                        help="crawler ที่จะวัด ระบุซ้ำได้ (ค่าเริ่มต้น http): http/browser = crawl.py, discover = discover.py")
+    parser.add_argument("--root", default="fixtures", help="โฟลเดอร์หน้าที่บันทึกไว้")
+    parser.add_argument("--input", default="programs_engineering.csv", help="รายการหลักสูตรสำหรับ crawl.py")
+    parser.add_argument("--universities", default="universities_list.csv", help="รายการมหาวิทยาลัยสำหรับ discover.py")
+    parser.add_argument("--limit", type=int, help="ใช้เฉพาะ N แถวแรกของ input")
+    parser.add_argument("--repeat", type=int, default=1, help="ดึงรายการหลักสูตรซ้ำกี่รอบ เพื่อให้มีจำนวนหน้ามากพอ")
+    parser.add_argument("--latency", type=float, default=0.0, help="หน่วงเวลาต่อ request ของเซิร์ฟเวอร์ (วินาที)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="สุ่มหน่วงเพิ่มได้ไม่เกินกี่วินาที")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="สัดส่วน request ที่ตอบ 503 (0-1)")
+    parser.add_argument("--seed", type=int, default=0, help="seed ของการสุ่ม latency/error")
+    parser.add_argument("--no-block", action="store_true", help="ไม่บล็อกรูป ฟอนต์ CSS ใน browser")
+    parser.add_argument("--sample-interval", type=float, default=0.1, help="ช่วงเวลาวัด RSS (วินาที)")
+    parser.add_argument("--output", default="bench.json")
+    sched.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,39 @@
+import hashlib
+
+
+def fragment_hash(fragments):
+    """
+    hash ของส่วนหน้าเว็บที่ใช้ดึงข้อมูล (dl และ ul.body.t-program) ถ้า hash เท่าเดิมแปลว่าข้อมูลไม่เปลี่ยน
+    """
+    digest = hashlib.sha256()
+    for fragment in fragments:
+        digest.update(" ".join(fragment.split()).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChangeSummary:
+    """
+    สรุปผลการ crawl รอบนี้: หลักสูตรที่ข้อมูลเปลี่ยน, ไม่เปลี่ยน และจำนวน byte ที่ไม่ต้องโหลดซ้ำ
+    """
+
+    def __init__(self):
+        self.changed = []
+        self.unchanged = []
+        self.bytes_saved = 0
+
+    def add(self, row, page):
+        name = f"{row['university']} | {row['program_name']}"
+        if page["status"] == "unchanged":
+            self.unchanged.append(name)
+            self.bytes_saved += page.get("bytes_saved", 0)
+        else:
+            self.changed.append(name)
+
+    def report(self):
+        print(f"ข้อมูลเปลี่ยน {len(self.changed)} หลักสูตร:")
+        for name in self.changed:
+            print(f"  * {name}")
+        print(f"ข้อมูลไม่เปลี่ยน {len(self.unchanged)} หลักสูตร:")
+        for name in self.unchanged:
+            print(f"  = {name}")
+        print(f"ไม่ต้องโหลดซ้ำ {self.bytes_saved:,} bytes")
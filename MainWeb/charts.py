@@ -0,0 +1,102 @@
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Above these sizes the charts switch to summaries so payload and render time stay bounded
+BOX_POINT_LIMIT = 5000
+SCATTER_POINT_LIMIT = 5000
+ROUND_NAMES = ['รอบที่ 1', 'รอบที่ 2', 'รอบที่ 3', 'รอบที่ 4']
+
+def box_figure(df):
+    """Fee distribution per university type; large inputs send precomputed quartiles instead of every fee"""
+    if len(df) <= BOX_POINT_LIMIT:
+        fig = px.box(
+            df,
+            x='university_type',
+            y='fee/term',
+            color='university_type',
+            title="ช่วงค่าเทอมแต่ละประเภทมหาวิทยาลัย"
+        )
+    else:
+        fig = go.Figure(layout_title_text="ช่วงค่าเทอมแต่ละประเภทมหาวิทยาลัย")
+        quartiles = df.groupby('university_type', observed=True)['fee/term'].quantile([0, 0.25, 0.5, 0.75, 1]).unstack()
+        colors = px.colors.qualitative.Plotly
+        for i, (university_type, q) in enumerate(quartiles.iterrows()):
+            fig.add_trace(go.Box(
+                name=str(university_type),
+                x=[str(university_type)],
+                lowerfence=[q[0]], q1=[q[0.25]], median=[q[0.5]], q3=[q[0.75]], upperfence=[q[1]],
+                marker_color=colors[i % len(colors)]
+            ))
+
+    fig.update_layout(
+        xaxis_title="ประเภทมหาวิทยาลัย",
+        yaxis_title="ค่าเทอม (บาท)",
+        showlegend=False
+    )
+    fig.update_xaxes(tickangle=45)
+    return fig
+
+def pie_figure(round_sums):
+    return px.pie(
+        values=round_sums.values,
+        names=ROUND_NAMES,
+        title="สัดส่วนการรับนักศึกษาแต่ละรอบ"
+    )
+
+def scatter_figure(df):
+    """
+    Fee vs total admission drawn with WebGL (scattergl).
+    Returns (figure, note); above SCATTER_POINT_LIMIT a fixed-seed sample is drawn and note says so.
+    """
+    note = None
+    if len(df) > SCATTER_POINT_LIMIT:
+        note = f"แสดงตัวอย่าง {SCATTER_POINT_LIMIT:,} จาก {len(df):,} หลักสูตร"
+        df = df.sample(n=SCATTER_POINT_LIMIT, random_state=0)
+
+    fig = px.scatter(
+        df,
+        x='fee/term',
+        y='total_admission',
+        color='university_type',
+        size='total_admission',
+        hover_data=['university', 'program_name'],
+        render_mode='webgl',
+        title="ค่าเทอม vs จำนวนที่รับ (ขนาดจุด = จำนวนที่รับ)"
+    )
+    fig.update_layout(
+        xaxis_title="ค่าเทอม (บาท)",
+        yaxis_title="จำนวนที่รับรวม (คน)"
+    )
+    return fig, note
+
+def build_charts(df, agg):
+    """All dashboard figures for one filter state"""
+    scatter, scatter_note = scatter_figure(df)
+    return {
+        'box': box_figure(df),
+        'pie': pie_figure(agg['round_sums']),
+        'scatter': scatter,
+        'scatter_note': scatter_note,
+    }
+
+def trend_figures(trends):
+    """Mean fee and total admission per snapshot, one line per university type"""
+    fee = px.line(trends, x='crawl_date', y='avg_fee', color='university_type', markers=True,
+                  title="ค่าเทอมเฉลี่ยในแต่ละรอบการเก็บข้อมูล")
+    fee.update_layout(xaxis_title="วันที่เก็บข้อมูล", yaxis_title="ค่าเทอมเฉลี่ย (บาท)")
+    quota = px.line(trends, x='crawl_date', y='total_admission', color='university_type', markers=True,
+                    title="จำนวนที่รับรวมในแต่ละรอบการเก็บข้อมูล")
+    quota.update_layout(xaxis_title="วันที่เก็บข้อมูล", yaxis_title="จำนวนที่รับรวม (คน)")
+    return fee, quota
+
+def program_trend_figure(series):
+    """Fee and per-round quota history of one program"""
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(x=series['crawl_date'], y=series['fee/term'], name="ค่าเทอม", mode='lines+markers'))
+    for name, col in zip(ROUND_NAMES, ['r1', 'r2', 'r3', 'r4']):
+        fig.add_trace(go.Bar(x=series['crawl_date'], y=series[col], name=name), secondary_y=True)
+    fig.update_layout(barmode='stack', title="ประวัติค่าเทอมและจำนวนที่รับของหลักสูตร")
+    fig.update_yaxes(title_text="ค่าเทอม (บาท)", secondary_y=False)
+    fig.update_yaxes(title_text="จำนวนที่รับ (คน)", secondary_y=True)
+    return fig
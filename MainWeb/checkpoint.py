@@ -0,0 +1,136 @@
+import json
+import re
+import sqlite3
+import time
+
+AGE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd]?)$")
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "": 86400}
+VALIDATOR_COLUMNS = {"etag": "TEXT", "last_modified": "TEXT", "content_hash": "TEXT", "size": "INTEGER"}
+# หลายโปรเซสเขียนไฟล์เดียวกัน (shard.py) รอ lock ได้นานกว่าค่าเริ่มต้น 5 วินาทีของ sqlite3
+BUSY_TIMEOUT = 60.0
+
+
+def parse_age(text):
+    """
+    แปลงช่วงเวลา เช่น "30m", "12h", "7d" หรือ "2" (วัน) เป็นวินาที
+    """
+    match = AGE_PATTERN.match(text.strip().lower())
+    if not match:
+        raise ValueError(f"รูปแบบช่วงเวลาไม่ถูกต้อง: {text} (ตัวอย่าง 30m, 12h, 7d)")
+    value, unit = match.groups()
+    return float(value) * AGE_UNITS[unit]
+
+
+class Checkpoint:
+    """
+    เก็บผลลัพธ์ของแต่ละ program_url ลง SQLite ทันทีที่ดึงเสร็จ
+    ถ้า crawl หยุดกลางทาง รันใหม่จะข้าม URL ที่ดึงไว้แล้ว
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # ETag/Last-Modified และ hash ของหน้า สำหรับ conditional re-fetch
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " program_url TEXT PRIMARY KEY,"
+            " record TEXT NOT NULL,"
+            " scraped_at REAL NOT NULL"
+            + "".join(f", {name} {kind}" for name, kind in VALIDATOR_COLUMNS.items())
+            + ")"
+        )
+        # ไฟล์ checkpoint เก่าไม่มีคอลัมน์ validator: เพิ่มให้ ถ้าโปรเซสอื่นเพิ่มไปก่อนแล้วก็ข้าม
+        columns = {name for _, name, *_ in self.conn.execute("PRAGMA table_info(results)")}
+        for name, kind in VALIDATOR_COLUMNS.items():
+            if name not in columns:
+                try:
+                    self.conn.execute(f"ALTER TABLE results ADD COLUMN {name} {kind}")
+                except sqlite3.OperationalError as e:
+                    if "duplicate column name" not in str(e):
+                        raise
+        self.conn.commit()
+
+    def save(self, program_url, record, page=None):
+        page = page or {}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results"
+            " (program_url, record, scraped_at, etag, last_modified, content_hash, size)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (program_url, json.dumps(record, ensure_ascii=False), time.time(),
+             *(page.get(name) for name in VALIDATOR_COLUMNS)),
+        )
+        self.conn.commit()
+
+    def touch(self, program_url, page=None):
+        """
+        หน้าไม่เปลี่ยน: อัปเดตเวลาที่ตรวจล่าสุด และ validator ใหม่ที่ server ส่งมา (ถ้ามี)
+        """
+        page = page or {}
+        updates = {name: page[name] for name in VALIDATOR_COLUMNS if page.get(name) is not None}
+        assignments = "".join(f", {name} = ?" for name in updates)
+        self.conn.execute(
+            f"UPDATE results SET scraped_at = ?{assignments} WHERE program_url = ?",
+            (time.time(), *updates.values(), program_url),
+        )
+        self.conn.commit()
+
+    def previous(self, program_url):
+        """
+        ผลเดิมและ validator ของ program_url หรือ None ถ้ายังไม่เคยดึง
+        """
+        row = self.conn.execute(
+            "SELECT record, etag, last_modified, content_hash, size FROM results WHERE program_url = ?",
+            (program_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        record, *validators = row
+        return {"record": json.loads(record), **dict(zip(VALIDATOR_COLUMNS, validators))}
+
+    def done_urls(self, max_age=None):
+        """
+        URL ที่ดึงไว้แล้ว ถ้ากำหนด max_age (วินาที) จะนับเฉพาะผลที่ใหม่กว่านั้น
+        """
+        if max_age is None:
+            cursor = self.conn.execute("SELECT program_url FROM results")
+        else:
+            cursor = self.conn.execute(
+                "SELECT program_url FROM results WHERE scraped_at >= ?", (time.time() - max_age,))
+        return {url for (url,) in cursor}
+
+    def records(self):
+        cursor = self.conn.execute("SELECT program_url, record FROM results")
+        return {url: json.loads(record) for url, record in cursor}
+
+    def close(self):
+        self.conn.close()
+
+
+def add_arguments(parser, default_path):
+    parser.add_argument("--checkpoint", default=default_path,
+                        help=f"ไฟล์ SQLite เก็บผลที่ดึงแล้ว สำหรับรันต่อเมื่อหยุดกลางทาง (ค่าเริ่มต้น {default_path})")
+    parser.add_argument("--refresh-older-than", type=parse_age,
+                        help="ดึงใหม่เฉพาะผลที่เก่ากว่าช่วงเวลานี้ เช่น 12h, 7d (ค่าเริ่มต้น ไม่ดึงซ้ำ)")
+
+
+def pending_rows(rows, checkpoint, max_age=None):
+    """
+    คืนเฉพาะแถวที่ยังไม่มีผลใน checkpoint (หรือผลเก่ากว่า max_age)
+    """
+    done = checkpoint.done_urls(max_age)
+    pending = [row for row in rows if row["program_url"] not in done]
+    skipped = len(rows) - len(pending)
+    if skipped:
+        print(f"ข้าม {skipped} แถวที่ดึงไว้แล้วใน {checkpoint.path}")
+    return pending
+
+
+def ordered_results(rows, pending, results, checkpoint):
+    """
+    รวมผลจาก checkpoint กับผลของรอบนี้ (results คู่กับ pending) แล้วเรียงตามลำดับ rows
+    แถวที่ดึงไม่สำเร็จรอบนี้จะใช้ผลเดิมใน checkpoint ถ้ามี
+    """
+    records = {row["program_url"]: result for row, result in zip(pending, results)}
+    records.update(checkpoint.records())
+    return [records[row["program_url"]] for row in rows if row["program_url"] in records]
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import csv
+import re
+from contextlib import asynccontextmanager
+from functools import partial
+from playwright.async_api import async_playwright
+
+import checkpoint as ckpt
+import normalize_fee
+import scheduler as sched
+from changes import ChangeSummary, fragment_hash
+from MyTCAS import extract_fee
+from admis import extract_rounds
+from fetch_http import fetch_program, new_client, rewrite_url
+from pool import TrafficStats, browser_page, run_pool
+
+FIELDNAMES = ["university", "faculty", "field_name", "program_name", "fee/term", "r1", "r2", "r3", "r4"]
+
+# เลขลำดับที่หน้าเว็บใส่ไว้หน้าชื่อ เช่น "1. คณะวิศวกรรมศาสตร์"
+NUMBER_PREFIX = re.compile(r"^\s*\d+\.\s*")
+
+def strip_number(text):
+    return NUMBER_PREFIX.sub("", text).strip()
+
+def parse_fee(fee_text):
+    """
+    แปลงข้อความค่าใช้จ่าย เช่น "ภาคการศึกษาละ 25,500 บาท" เป็นค่าต่อเทอม ถ้าแปลงไม่ได้คืนค่าว่าง
+    """
+    try:
+        fee = normalize_fee.parse_fee(fee_text)["fee_per_term"]
+    except normalize_fee.FeeError:
+        return ""
+    return int(fee) if fee.is_integer() else fee
+
+async def scrape_program(page, program_url, previous=None):
+    """
+    โหลดหน้า program_url ครั้งเดียว แล้วดึงทั้งค่าใช้จ่ายและจำนวนที่รับแต่ละรอบ
+    ถ้า hash ของ dl และ ul.body.t-program เท่ากับรอบก่อน จะข้ามการดึงข้อมูล
+    """
+    await page.goto(program_url, wait_until="domcontentloaded")
+    await page.wait_for_selector("dl", timeout=10000)
+    await page.wait_for_selector("ul.body.t-program")
+
+    fragments = await page.eval_on_selector_all(
+        "dl, ul.body.t-program", "els => els.map(el => el.outerHTML)")
+    result = {"content_hash": fragment_hash(fragments)}
+    if previous and previous.get("content_hash") == result["content_hash"]:
+        result["status"] = "unchanged"
+        return result
+
+    result["status"] = "changed"
+    result["fee"] = await extract_fee(page)
+    result["rounds"] = await extract_rounds(page)
+    return result
+
+class BrowserFallback:
+    """
+    เปิด Chromium เฉพาะเมื่อมีหน้าที่ HTTP backend อ่านไม่ได้ และใช้ browser เดียวร่วมกันทุก worker
+    """
+
+    def __init__(self, stats=None, block=True):
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self.stats = stats
+        self.block = block
+
+    async def scrape(self, program_url, previous=None):
+        async with self._lock:
+            if self._browser is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+
+        async with browser_page(self._browser, self.stats, self.block) as page:
+            return await scrape_program(page, program_url, previous)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            await self._playwright.stop()
+
+@asynccontextmanager
+async def browser_worker(browser, stats=None, block=True):
+    async with browser_page(browser, stats, block) as page:
+        yield partial(scrape_program, page)
+
+@asynccontextmanager
+async def http_worker(client, fallback):
+    async def fetch(program_url, previous=None):
+        result = await fetch_program(client, program_url, previous)
+        if result is None:
+            print(f"ต้องใช้ browser: {program_url}")
+            result = await fallback.scrape(program_url, previous)
+        return result
+
+    yield fetch
+
+def program_row(row, fee, rounds):
+    return {
+        "university": row["university"].strip(),
+        "faculty": strip_number(row["faculty"]),
+        "field_name": strip_number(row["field_name"]),
+        "program_name": row["program_name"].strip(),
+        "fee/term": parse_fee(fee),
+        **rounds,
+    }
+
+def failed_row(row, error):
+    return program_row(row, "", {"r1": "-", "r2": "-", "r3": "-", "r4": "-"})
+
+async def scrape_row(fetch, row, base_url=None, checkpoint=None, summary=None):
+    """
+    ดึงข้อมูลหนึ่งแถว ถ้า error จะส่ง exception ต่อให้ scheduler ลองใหม่
+    """
+    print(f"กำลังดึงข้อมูล: {row['university']} | {row['program_name']}")
+
+    program_url = row["program_url"]
+    previous = checkpoint.previous(program_url) if checkpoint is not None else None
+
+    page = await fetch(rewrite_url(program_url, base_url), previous)
+    if summary is not None:
+        summary.add(row, page)
+
+    # หน้าไม่เปลี่ยนจากรอบก่อน ใช้ผลเดิมใน checkpoint
+    if page["status"] == "unchanged":
+        checkpoint.touch(program_url, page)
+        return previous["record"]
+
+    result = program_row(row, page["fee"], page["rounds"])
+    if checkpoint is not None:
+        checkpoint.save(program_url, result, page)
+    return result
+
+async def crawl(rows, scheduler, backend="http", base_url=None, checkpoint=None, summary=None,
+                stats=None, block=True, on_error=failed_row):
+    """
+    ดึงข้อมูลทุกแถวด้วย backend ที่เลือก
+    "http" ใช้ httpx + BeautifulSoup และเปิด Chromium เฉพาะหน้าที่ต้องใช้ JavaScript
+    "browser" ใช้ Playwright ทุกหน้า (browser เดียว แยก context เล็ก ๆ ต่อ worker)
+    แถวที่ดึงไม่สำเร็จได้ผลเป็น on_error(row, error) (ค่าเริ่มต้น failed_row)
+    """
+    scrape = partial(scrape_row, base_url=base_url, checkpoint=checkpoint, summary=summary)
+
+    if backend == "browser":
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            results = await run_pool(partial(browser_worker, browser, stats, block), rows, scrape,
+                                     scheduler, on_error)
+            await browser.close()
+        return results
+
+    fallback = BrowserFallback(stats, block)
+    try:
+        async with new_client(scheduler.max_concurrency) as client:
+            return await run_pool(partial(http_worker, client, fallback), rows, scrape, scheduler, on_error)
+    finally:
+        await fallback.close()
+
+async def main(args):
+    with open(args.input, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    checkpoint = ckpt.Checkpoint(args.checkpoint)
+    pending = ckpt.pending_rows(rows, checkpoint, args.refresh_older_than)
+
+    summary = ChangeSummary()
+    stats = TrafficStats()
+    results = await crawl(pending, sched.from_args(args), args.backend, args.base_url, checkpoint, summary,
+                          stats, not args.no_block)
+    results = ckpt.ordered_results(rows, pending, results, checkpoint)
+    checkpoint.close()
+    summary.report()
+    if stats.requests:
+        stats.report(len(pending))
+
+    # เขียนเป็นรูปแบบเดียวกับ MainData.csv ที่ Dashboard.py ใช้
+    with open(args.output, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"บันทึกไฟล์เสร็จ: {args.output}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="ดึงค่าใช้จ่ายและจำนวนที่รับของทุกหลักสูตร โดยโหลดแต่ละหน้าเพียงครั้งเดียว")
+    parser.add_argument("--input", default="programs_engineering.csv",
+                        help="ไฟล์ที่มีคอลัมน์ program_url (ค่าเริ่มต้น programs_engineering.csv)")
+    parser.add_argument("--output", default="MainData.csv",
+                        help="ไฟล์ผลลัพธ์ในรูปแบบ MainData.csv (ค่าเริ่มต้น MainData.csv)")
+    parser.add_argument("--backend", choices=["http", "browser"], default="http",
+                        help="http = httpx + BeautifulSoup (ใช้ Chromium เฉพาะเมื่อจำเป็น), browser = Playwright ทุกหน้า")
+    sched.add_arguments(parser)
+    parser.add_argument("--base-url",
+                        help="ใช้แทน https://course.mytcas.com เช่น http://127.0.0.1:8000 ของ fixture_server.py")
+    parser.add_argument("--no-block", action="store_true",
+                        help="ให้ browser โหลดรูป ฟอนต์ CSS และสคริปต์ analytics ด้วย (ค่าเริ่มต้น บล็อก)")
+    ckpt.add_arguments(parser, "MainData.checkpoint.db")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
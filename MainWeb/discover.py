@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import csv
+import re
+import sys
+import time
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+import scheduler as sched
+from fetch_http import new_client, original_url, rewrite_url
+
+# รูปแบบลิงก์ของแต่ละระดับบน course.mytcas.com
+FACULTY_LINK = re.compile(r"^/universities/[^/]+/faculties/[^/]+/?$")
+FIELD_LINK = re.compile(r"^/universities/[^/]+/faculties/[^/]+/fields/[^/]+/?$")
+PROGRAM_LINK = re.compile(r"^/programs/[^/]+/?$")
+
+FIELDNAMES = ["university", "faculty", "field_name", "program_name", "program_url"]
+FIELD_FIELDNAMES = ["university", "faculty", "field_name", "field_url"]
+
+
+def matches(text, keywords):
+    return not keywords or any(keyword in text for keyword in keywords)
+
+
+def transient(error):
+    """error ที่ลองใหม่แล้วอาจสำเร็จ: timeout/connection error และ HTTP 429/5xx (404 ลองใหม่ก็ไม่ได้)"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class Discovery:
+    """
+    ไล่ลิงก์แบบ breadth-first จากหน้ามหาวิทยาลัย -> คณะ -> สาขา -> หลักสูตร
+    หน้าในระดับเดียวกันโหลดพร้อมกัน แต่ละระดับมี semaphore จำกัดจำนวน request ของตัวเอง
+    URL ที่เคยเข้าแล้วจะไม่ถูกโหลดซ้ำ: ลิงก์ของแต่ละระดับถูกจองใน seen หลังโหลดครบทั้งระดับ
+    ตามลำดับหน้าแม่ จึงได้ลำดับผลและหน้าแม่ของแต่ละลิงก์เหมือนเดิมทุกครั้งไม่ว่าหน้าไหนโหลดเสร็จก่อน
+    error ชั่วคราวลองใหม่ด้วย backoff ของ scheduler; หน้าที่ยังโหลดไม่ได้ถูกเก็บไว้ใน failed
+    """
+
+    def __init__(self, client, limits, faculty_keywords, field_keywords, base_url=None, scheduler=None):
+        self.client = client
+        self.semaphores = {level: asyncio.Semaphore(limit) for level, limit in limits.items()}
+        self.faculty_keywords = faculty_keywords
+        self.field_keywords = field_keywords
+        self.base_url = base_url
+        self.scheduler = scheduler or sched.Scheduler()
+        self.seen = set()
+        self.pages = {level: 0 for level in limits}
+        self.failed = []
+
+    def first_visit(self, url):
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        return True
+
+    async def links(self, level, url, pattern):
+        """
+        โหลดหน้า url แล้วคืนลิงก์ [(ข้อความ, URL จริง)] ที่ path ตรงกับ pattern (ไม่ซ้ำกันภายในหน้า)
+        """
+        for attempt in range(self.scheduler.max_retries + 1):
+            try:
+                async with self.semaphores[level]:
+                    response = await self.client.get(rewrite_url(url, self.base_url))
+                response.raise_for_status()
+                break
+            except Exception as e:
+                if attempt == self.scheduler.max_retries or not transient(e):
+                    print(f"Error ({level}): {url} {e}")
+                    self.scheduler.failures += 1
+                    self.failed.append((level, url, str(e)))
+                    return []
+                self.scheduler.retries += 1
+                delay = self.scheduler.backoff(attempt)
+                print(f"ลองใหม่ครั้งที่ {attempt + 1} ใน {delay:.1f} วินาที ({level}): {url} ({e})")
+                await asyncio.sleep(delay)
+        self.pages[level] += 1
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        found, on_page = [], set()
+        for a in soup.select("a[href]"):
+            href = original_url(urljoin(str(response.url), a["href"]), self.base_url)
+            if pattern.match(urlsplit(href).path) and href not in on_page:
+                on_page.add(href)
+                found.append((a.get_text(" ", strip=True), href))
+        return found
+
+    async def level(self, level, parents, pattern):
+        """
+        โหลดหน้าของ parents [(ข้อมูลหน้าแม่, url)] พร้อมกัน แล้วคืน [(ข้อมูลหน้าแม่, ข้อความ, URL)]
+        ของลิงก์ที่ยังไม่เคยเข้า เรียงตามลำดับ parents และลำดับลิงก์บนหน้า
+        """
+        pages = await asyncio.gather(*(self.links(level, url, pattern) for _, url in parents))
+        return [(parent, text, href)
+                for (parent, _), found in zip(parents, pages)
+                for text, href in found if self.first_visit(href)]
+
+    async def run(self, universities):
+        """
+        คืน (รายการสาขา, รายการหลักสูตร) เรียงตามลำดับมหาวิทยาลัยและลำดับลิงก์บนหน้าเว็บ
+        """
+        universities = [(u["name"], u["url"]) for u in universities if self.first_visit(u["url"])]
+
+        faculties = [((university, faculty), url)
+                     for university, faculty, url in await self.level("university", universities, FACULTY_LINK)
+                     if matches(faculty, self.faculty_keywords)]
+        fields = [{"university": university, "faculty": faculty, "field_name": field_name, "field_url": url}
+                  for (university, faculty), field_name, url in await self.level("faculty", faculties, FIELD_LINK)
+                  if matches(field_name, self.field_keywords)]
+        programs = [{"university": field["university"], "faculty": field["faculty"],
+                     "field_name": field["field_name"], "program_name": program_name, "program_url": program_url}
+                    for field, program_name, program_url in
+                    await self.level("field", [(field, field["field_url"]) for field in fields], PROGRAM_LINK)]
+        return fields, programs
+
+
+def write_csv(path, fieldnames, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+async def main(args):
+    with open(args.input, newline="", encoding="utf-8") as f:
+        universities = list(csv.DictReader(f))
+
+    limits = {"university": args.university_concurrency,
+              "faculty": args.faculty_concurrency,
+              "field": args.field_concurrency}
+
+    start = time.perf_counter()
+    async with new_client(sum(limits.values())) as client:
+        discovery = Discovery(client, limits, args.faculty_keyword, args.field_keyword, args.base_url,
+                              sched.Scheduler(max_retries=args.max_retries))
+        fields, programs = await discovery.run(universities)
+    elapsed = time.perf_counter() - start
+
+    if discovery.failed:
+        # ผลไม่ครบ: ไม่เขียนทับไฟล์เดิม ให้รันใหม่ได้ผลเดียวกับรอบที่ครบ
+        print(f"โหลดไม่สำเร็จ {len(discovery.failed)} หน้า ไม่บันทึก {args.output}:")
+        for level, url, error in discovery.failed:
+            print(f"  - {level}: {url} ({error})")
+        sys.exit(1)
+
+    # ผลเรียงตามลำดับใน universities_list.csv และลำดับลิงก์บนหน้าเว็บ จึงได้ไฟล์เดิมทุกครั้งที่รัน
+    write_csv(args.output, FIELDNAMES, programs)
+    if args.fields_output:
+        write_csv(args.fields_output, FIELD_FIELDNAMES, fields)
+
+    pages = ", ".join(f"{level} {count}" for level, count in discovery.pages.items())
+    print(f"พบ {len(programs)} หลักสูตร จาก {len(universities)} มหาวิทยาลัย ใช้เวลา {elapsed:.1f} วินาที ({pages} หน้า)")
+    print(f"บันทึกไฟล์เสร็จ: {args.output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="ค้นหาหลักสูตรจาก universities_list.csv ไล่ระดับ มหาวิทยาลัย -> คณะ -> สาขา -> หลักสูตร")
+    parser.add_argument("--input", default="universities_list.csv",
+                        help="ไฟล์รายชื่อมหาวิทยาลัย (คอลัมน์ name,url)")
+    parser.add_argument("--output", default="programs_engineering.csv")
+    parser.add_argument("--fields-output",
+                        help="บันทึกรายการสาขาที่ผ่านตัวกรองด้วย เช่น universities_faculty_filtered_fields.csv")
+    parser.add_argument("--faculty-keyword", action="append",
+                        help="เลือกเฉพาะคณะที่มีคำนี้ (ใส่ได้หลายครั้ง, ค่าเริ่มต้น วิศวกรรมศาสตร์)")
+    parser.add_argument("--field-keyword", action="append",
+                        help="เลือกเฉพาะสาขาที่มีคำนี้ (ใส่ได้หลายครั้ง, ค่าเริ่มต้น คอมพิวเตอร์ และ ปัญญาประดิษฐ์)")
+    parser.add_argument("--all", action="store_true", help="ไม่กรองคณะและสาขา (ทุกหลักสูตร)")
+    parser.add_argument("--university-concurrency", type=int, default=4)
+    parser.add_argument("--faculty-concurrency", type=int, default=8)
+    parser.add_argument("--field-concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="จำนวนครั้งที่ลองใหม่เมื่อ timeout หรือ HTTP 429/5xx (ค่าเริ่มต้น 3)")
+    parser.add_argument("--base-url",
+                        help="ใช้แทน https://course.mytcas.com เช่น http://127.0.0.1:8000 ของ fixture_server.py")
+    args = parser.parse_args()
+
+    if args.all:
+        args.faculty_keyword, args.field_keyword = [], []
+    else:
+        args.faculty_keyword = args.faculty_keyword or ["วิศวกรรมศาสตร์"]
+        args.field_keyword = args.field_keyword or ["คอมพิวเตอร์", "ปัญญาประดิษฐ์"]
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,120 @@
+import httpx
+from bs4 import BeautifulSoup
+
+from changes import fragment_hash
+
+# ใช้ header คล้าย browser เพื่อให้ได้ HTML แบบเดียวกับที่ Playwright เห็น
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept-Language": "th,en;q=0.8",
+}
+
+TCAS_URL = "https://course.mytcas.com"
+
+
+def rewrite_url(url, base_url):
+    """
+    เปลี่ยนโดเมน course.mytcas.com เป็น base_url เช่น fixture server ในเครื่อง
+    """
+    if base_url and url.startswith(TCAS_URL):
+        return base_url.rstrip("/") + url[len(TCAS_URL):]
+    return url
+
+
+def original_url(url, base_url):
+    """
+    กลับด้านของ rewrite_url: URL จาก fixture server -> URL จริงบน course.mytcas.com
+    """
+    base_url = (base_url or "").rstrip("/")
+    if base_url and url.startswith(base_url):
+        return TCAS_URL + url[len(base_url):]
+    return url
+
+
+def new_client(concurrency=4, timeout=15.0):
+    """
+    สร้าง httpx.AsyncClient ที่ใช้ connection ซ้ำ (keep-alive) ร่วมกันทุก worker
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=timeout, follow_redirects=True)
+
+
+def extract_fee_html(soup):
+    """
+    หา <dt> ที่มีข้อความ "ค่าใช้จ่าย" แล้วคืนข้อความของ <dd> ถัดไป (selector เดียวกับ MyTCAS.extract_fee)
+    """
+    for dt in soup.select("dl dt"):
+        if "ค่าใช้จ่าย" in dt.get_text(strip=True):
+            dd = dt.find_next_sibling()
+            if dd:
+                return dd.get_text(" ", strip=True)
+    return "ไม่พบข้อมูล"
+
+
+def extract_rounds_html(soup):
+    """
+    ดึงจำนวนที่รับรอบ r1-r4 (selector เดียวกับ admis.extract_rounds)
+    """
+    rounds = {"r1": "-", "r2": "-", "r3": "-", "r4": "-"}
+
+    for r in rounds.keys():
+        li = soup.select_one(f"li#{r}")
+        if not li or li.select_one(".not-open"):
+            continue
+
+        quota_b = li.select_one("small.receive-quota b")
+        if quota_b:
+            rounds[r] = quota_b.get_text(strip=True)
+
+    return rounds
+
+
+def program_soup(html):
+    """
+    แปลง HTML ของหน้าหลักสูตรเป็น soup
+    คืน None ถ้าหน้าไม่มี markup ที่ต้องการ (เช่น หน้าที่ต้องรัน JavaScript ก่อน)
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    if not soup.select_one("dl") or not soup.select_one("ul.body.t-program"):
+        return None
+    return soup
+
+
+def conditional_headers(previous):
+    headers = {}
+    if previous and previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous and previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+async def fetch_program(client, program_url, previous=None):
+    """
+    โหลดหน้า program_url ด้วย HTTP ธรรมดา แล้วคืน dict ของหน้า หรือ None ถ้าต้องใช้ browser
+    previous คือ ETag/Last-Modified/hash ที่บันทึกไว้รอบก่อน ใช้ส่ง conditional request
+    ถ้า server ตอบ 304 หรือ hash ของส่วนที่ใช้ไม่เปลี่ยน จะคืน status "unchanged" โดยไม่ดึงข้อมูลซ้ำ
+    """
+    response = await client.get(program_url, headers=conditional_headers(previous))
+    if response.status_code == 304:
+        return {"status": "unchanged", "bytes_saved": previous.get("size") or 0}
+    response.raise_for_status()
+
+    soup = program_soup(response.text)
+    if soup is None:
+        return None
+
+    page = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_hash": fragment_hash(str(el) for el in soup.select("dl, ul.body.t-program")),
+        "size": len(response.content),
+    }
+    if previous and previous.get("content_hash") == page["content_hash"]:
+        page["status"] = "unchanged"
+        return page
+
+    page["status"] = "changed"
+    page["fee"] = extract_fee_html(soup)
+    page["rounds"] = extract_rounds_html(soup)
+    return page
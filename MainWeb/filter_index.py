@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+class LRUCache:
+    """Small thread-safe LRU cache (Streamlit sessions rerun in separate threads)"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+def filter_key(min_fee, max_fee, university_types, min_admission):
+    """Hashable, order-independent key for one sidebar filter state"""
+    return (min_fee, max_fee, tuple(sorted(university_types)), min_admission)
+
+class FilterIndex:
+    """
+    Precomputed index over the sidebar filter columns, built once per dataset:
+    rows sorted by fee (range queries use binary search), one packed bitset of row ids
+    per university type, and total_admission sorted for the minimum-admission cutoff.
+    """
+
+    def __init__(self, df, cache_size=256):
+        self.size = len(df)
+
+        fee = df['fee/term'].to_numpy(dtype=float)
+        self.fee_order = np.argsort(fee, kind='stable')
+        self.sorted_fee = fee[self.fee_order]
+
+        types = df['university_type'].astype(str).to_numpy()
+        self.type_bits = {t: np.packbits(types == t) for t in np.unique(types)}
+
+        admission = df['total_admission'].to_numpy(dtype=float)
+        self.admission_order = np.argsort(admission, kind='stable')
+        self.sorted_admission = admission[self.admission_order]
+        self.admission_rank = np.empty(self.size, dtype=np.int64)
+        self.admission_rank[self.admission_order] = np.arange(self.size)
+
+        self.cache = LRUCache(cache_size)
+
+    def _type_mask(self, university_types):
+        bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for university_type in university_types:
+            if university_type in self.type_bits:
+                bits |= self.type_bits[university_type]
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def _query(self, key):
+        min_fee, max_fee, university_types, min_admission = key
+
+        # NaN fees sort last, so they never fall inside a fee range (same as the old comparisons)
+        lo = np.searchsorted(self.sorted_fee, min_fee, side='left')
+        hi = np.searchsorted(self.sorted_fee, max_fee, side='right')
+        candidates = self.fee_order[lo:hi]
+
+        # A row passes the admission cutoff when its rank in sorted total_admission is past the cutoff position
+        start = np.searchsorted(self.sorted_admission, min_admission, side='left')
+        keep = self._type_mask(university_types)[candidates] & (self.admission_rank[candidates] >= start)
+        rows = np.sort(candidates[keep])
+        rows.setflags(write=False)
+        return rows
+
+    def query(self, min_fee, max_fee, university_types, min_admission):
+        """Row positions (in original order) matching the filter; results are LRU-cached per filter tuple"""
+        key = filter_key(min_fee, max_fee, university_types, min_admission)
+        return self.cache.get_or_compute(key, lambda: self._query(key))
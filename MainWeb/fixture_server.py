@@ -0,0 +1,158 @@
+"""
+เซิร์ฟเวอร์ HTTP ในเครื่องสำหรับเสิร์ฟหน้าหลักสูตรที่บันทึกไว้ ใช้ทดสอบ crawler โดยไม่ต้องยิงเว็บจริง
+
+    python fixture_server.py save --input programs_engineering.csv   # บันทึกหน้าไว้ใน fixtures/
+    python fixture_server.py save-site --input universities_list.csv # บันทึกหน้ามหาวิทยาลัย/คณะ/สาขา สำหรับ discover.py
+    python fixture_server.py serve --port 8000                       # เสิร์ฟ fixtures/
+    python fixture_server.py serve --latency 0.2 --error-rate 0.05   # จำลองเว็บช้าและตอบ 503 บางครั้ง
+    python crawl.py --base-url http://127.0.0.1:8000 --output /tmp/MainData.csv
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from fetch_http import new_client
+
+def fixture_path(root, url_path):
+    """
+    /programs/10010121300501A -> <root>/programs/10010121300501A.html
+    """
+    path = urlsplit(url_path).path.strip("/") or "index"
+    return os.path.join(root, *path.split("/")) + ".html"
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    เสิร์ฟไฟล์ใน root โดยหน่วงเวลา latency (+ สุ่มเพิ่มไม่เกิน jitter) วินาทีต่อ request
+    และตอบ 503 ตามสัดส่วน error_rate เพื่อทดสอบ retry/AIMD ของ crawler
+    """
+    root = "fixtures"
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    random = random.Random()
+    counts = None
+
+    def do_GET(self):
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        error = self.random.random() < self.error_rate
+        with self.counts["lock"]:
+            self.counts["requests"] += 1
+            self.counts["errors"] += error
+        if error:
+            self.send_error(503, "injected error")
+            return
+        super().do_GET()
+
+    def translate_path(self, path):
+        return fixture_path(self.root, path)
+
+    def guess_type(self, path):
+        return "text/html; charset=utf-8"
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(root, host="127.0.0.1", port=8000, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    สร้างเซิร์ฟเวอร์ (ยังไม่เริ่ม serve_forever) จำนวน request และ error ที่จำลองอยู่ใน server.counts
+    """
+    counts = {"requests": 0, "errors": 0, "lock": threading.Lock()}
+    handler = type("Handler", (FixtureHandler,), {
+        "root": root, "latency": latency, "jitter": jitter, "error_rate": error_rate,
+        "random": random.Random(seed), "counts": counts,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.counts = counts
+    print(f"เสิร์ฟ {root} ที่ http://{host}:{server.server_address[1]}")
+    return server
+
+async def save(input_file, root, concurrency=4):
+    with open(input_file, newline="", encoding="utf-8") as f:
+        urls = [row["program_url"] for row in csv.DictReader(f)]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def save_one(client, url):
+        async with semaphore:
+            response = await client.get(url)
+        path = fixture_path(root, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"บันทึก {url} -> {path}")
+
+    async with new_client(concurrency) as client:
+        await asyncio.gather(*(save_one(client, url) for url in urls))
+
+class RecordingClient:
+    """
+    ห่อ httpx client: ทุกหน้าที่ get สำเร็จจะถูกบันทึกลง root ด้วย path เดียวกับที่ FixtureHandler เสิร์ฟ
+    """
+
+    def __init__(self, client, root):
+        self.client = client
+        self.root = root
+
+    async def get(self, url, **kwargs):
+        response = await self.client.get(url, **kwargs)
+        if response.status_code == 200:
+            path = fixture_path(self.root, url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(response.text)
+        return response
+
+async def save_site(input_file, root, concurrency=4):
+    """
+    ไล่หน้ามหาวิทยาลัย -> คณะ -> สาขา -> หลักสูตร ด้วย discover.py แล้วบันทึกทุกหน้าที่โหลด
+    (ทุกคณะและทุกสาขา ไม่กรอง keyword) จากนั้นบันทึกหน้าหลักสูตรทั้งหมด
+    """
+    from discover import Discovery
+
+    with open(input_file, newline="", encoding="utf-8") as f:
+        universities = list(csv.DictReader(f))
+
+    limits = {"university": concurrency, "faculty": concurrency, "field": concurrency}
+    async with new_client(concurrency) as client:
+        discovery = Discovery(RecordingClient(client, root), limits, [], [])
+        _, programs = await discovery.run(universities)
+        recorder = RecordingClient(client, root)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def save_one(url):
+            async with semaphore:
+                await recorder.get(url)
+
+        await asyncio.gather(*(save_one(row["program_url"]) for row in programs))
+    print(f"บันทึกหน้าของ {len(universities)} มหาวิทยาลัย และ {len(programs)} หลักสูตร ลงใน {root}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="บันทึกและเสิร์ฟหน้าหลักสูตรสำหรับทดสอบ crawler")
+    parser.add_argument("command", choices=["serve", "save", "save-site"])
+    parser.add_argument("--root", default="fixtures", help="โฟลเดอร์เก็บหน้าที่บันทึกไว้")
+    parser.add_argument("--input", default="programs_engineering.csv", help="ไฟล์ที่มี program_url (save) หรือ name,url ของมหาวิทยาลัย (save-site)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="หน่วงเวลาต่อ request (วินาที)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="สุ่มหน่วงเพิ่มได้ไม่เกินกี่วินาที")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="สัดส่วน request ที่ตอบ 503 (0-1)")
+    parser.add_argument("--seed", type=int, help="seed ของการสุ่ม latency/error เพื่อให้ผลซ้ำได้")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "save":
+        asyncio.run(save(args.input, args.root))
+    elif args.command == "save-site":
+        asyncio.run(save_site(args.input, args.root))
+    else:
+        serve(args.root, port=args.port, latency=args.latency, jitter=args.jitter,
+              error_rate=args.error_rate, seed=args.seed).serve_forever()
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+WATCH_INTERVAL = 5.0
+
+def file_signature(paths):
+    """Cheap stat-based fingerprint: (path, mtime_ns, size) for every watched file that exists"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def content_hash(paths, chunk_size=1 << 20):
+    """sha256 over the watched files' contents; a touch without a content change keeps the same version"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+class Snapshot:
+    """One loaded dataset version plus whatever prepare() derived from it"""
+
+    def __init__(self, df, version, modified_at, resources):
+        self.df = df
+        self.version = version
+        self.modified_at = modified_at
+        self.loaded_at = datetime.now()
+        self.resources = resources
+
+class DataWatcher:
+    """
+    Keeps the current Snapshot for a set of data files and reloads it in a background thread.
+    The files are polled by stat; a new signature must be seen on two polls in a row before
+    reloading, so a crawler still writing the CSV is not read half-way. The new data is loaded
+    and prepared off the request path and swapped in with one reference assignment, so readers
+    see either the old snapshot or the new one. A failed reload keeps serving the old data.
+    """
+
+    def __init__(self, paths, load, prepare=lambda df: {}, interval=WATCH_INTERVAL):
+        self.paths = list(paths)
+        self.load = load
+        self.prepare = prepare
+        self.interval = interval
+        self.reloads = 0
+        self.errors = 0
+        self._signature = file_signature(self.paths)
+        self._pending = None
+        self._stop = threading.Event()
+        self.current = self._build(self._signature)
+        self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+        self._thread.start()
+
+    def _build(self, signature):
+        df = self.load()
+        modified_at = datetime.fromtimestamp(max((mtime for _, mtime, _ in signature), default=0) / 1e9)
+        return Snapshot(df, content_hash(self.paths), modified_at, self.prepare(df))
+
+    def check(self):
+        """One poll; returns True when a new snapshot was swapped in"""
+        signature = file_signature(self.paths)
+        if signature == self._signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            self._pending = signature
+            return False
+
+        self._signature, self._pending = signature, None
+        if content_hash(self.paths) == self.current.version:
+            return False
+        try:
+            snapshot = self._build(signature)
+        except Exception as e:
+            self.errors += 1
+            print(f"data-watcher: reload failed, keeping version {self.current.version} ({e})")
+            return False
+        self.current = snapshot
+        self.reloads += 1
+        print(f"data-watcher: loaded version {snapshot.version} ({len(snapshot.df)} rows)")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
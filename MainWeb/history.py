@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ingest import DATA_FILE, RULES_FILE, load_csv
+
+HISTORY_DIR = 'history'
+PART_FILE = 'data.parquet'
+
+# history/academic_year=2025/crawl_date=2025-03-01/data.parquet
+PARTITIONING = ds.partitioning(
+    pa.schema([('academic_year', pa.int32()), ('crawl_date', pa.string())]),
+    flavor='hive'
+)
+
+def program_keys(df):
+    """
+    Stable per-program key: the TCAS program id when a program_url column is present,
+    otherwise a short hash of the stripped university, faculty and program names.
+    """
+    if 'program_url' in df:
+        return df['program_url'].astype(str).str.rstrip('/').str.rsplit('/', n=1).str[-1]
+    names = (df['university'].astype(str).str.strip() + '|'
+             + df['faculty'].astype(str).str.strip() + '|'
+             + df['program_name'].astype(str).str.strip())
+    return names.map(lambda name: hashlib.sha1(name.encode('utf-8')).hexdigest()[:16])
+
+def partition_path(academic_year, crawl_date, root=HISTORY_DIR):
+    return os.path.join(root, f'academic_year={academic_year}', f'crawl_date={crawl_date}')
+
+def list_partitions(root=HISTORY_DIR):
+    """(academic_year, crawl_date) for every snapshot, oldest first; reads directory names only"""
+    partitions = []
+    if not os.path.isdir(root):
+        return partitions
+    for year_dir in os.scandir(root):
+        if not year_dir.name.startswith('academic_year='):
+            continue
+        for date_dir in os.scandir(year_dir.path):
+            if date_dir.name.startswith('crawl_date=') and os.path.exists(os.path.join(date_dir.path, PART_FILE)):
+                partitions.append((int(year_dir.name.split('=', 1)[1]), date_dir.name.split('=', 1)[1]))
+    return sorted(partitions, key=lambda p: (p[1], p[0]))
+
+def write_snapshot(df, academic_year, crawl_date, root=HISTORY_DIR):
+    """
+    Append one snapshot as a new partition. Existing partitions are never rewritten;
+    the file is written to a hidden directory first and renamed into place.
+    """
+    path = partition_path(academic_year, crawl_date, root)
+    if os.path.exists(path):
+        raise FileExistsError(f'snapshot already exists: {path}')
+
+    # Sorted by key so per-program lookups can skip row groups by their min/max statistics
+    snapshot = df.drop(columns=['academic_year', 'crawl_date'], errors='ignore')
+    snapshot = snapshot.assign(program_key=program_keys(snapshot)).sort_values('program_key', kind='stable')
+
+    # Fixed column types so every partition shares one schema (parquet dictionary-encodes strings anyway)
+    for col in snapshot.columns:
+        if isinstance(snapshot[col].dtype, pd.CategoricalDtype):
+            snapshot[col] = snapshot[col].astype(str)
+        elif pd.api.types.is_numeric_dtype(snapshot[col]):
+            snapshot[col] = snapshot[col].astype('float64')
+
+    tmp_path = os.path.join(root, f'.tmp-{academic_year}-{crawl_date}')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    pq.write_table(pa.Table.from_pandas(snapshot, preserve_index=False), os.path.join(tmp_path, PART_FILE),
+                   row_group_size=4096)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return path
+
+def _dataset(root=HISTORY_DIR):
+    return ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+
+def latest(root=HISTORY_DIR, academic_year=None, columns=None):
+    """The most recent snapshot (optionally within one academic year); only that partition is read"""
+    partitions = [p for p in list_partitions(root) if academic_year is None or p[0] == academic_year]
+    if not partitions:
+        return pd.DataFrame(columns=columns)
+    year, crawl_date = partitions[-1]
+    df = pq.read_table(os.path.join(partition_path(year, crawl_date, root), PART_FILE), columns=columns).to_pandas()
+    return df.assign(academic_year=year, crawl_date=crawl_date)
+
+def program_history(key, root=HISTORY_DIR, academic_years=None, columns=None):
+    """Time series for one program across snapshots, oldest first"""
+    if not list_partitions(root):
+        return pd.DataFrame(columns=columns)
+    condition = ds.field('program_key') == key
+    if academic_years is not None:
+        condition = condition & ds.field('academic_year').isin(list(academic_years))
+    if columns is not None:
+        columns = list(dict.fromkeys([*columns, 'academic_year', 'crawl_date']))
+    df = _dataset(root).to_table(columns=columns, filter=condition).to_pandas()
+    return df.sort_values('crawl_date', kind='stable').reset_index(drop=True)
+
+def snapshot_trends(root=HISTORY_DIR, academic_years=None):
+    """Per snapshot and university type: program count, mean fee and total admission slots"""
+    columns = ['university_type', 'fee/term', 'total_admission', 'academic_year', 'crawl_date']
+    if not list_partitions(root):
+        return pd.DataFrame(columns=['crawl_date', 'academic_year', 'university_type', 'programs', 'avg_fee', 'total_admission'])
+    condition = None if academic_years is None else ds.field('academic_year').isin(list(academic_years))
+    df = _dataset(root).to_table(columns=columns, filter=condition).to_pandas()
+    df['university_type'] = df['university_type'].astype(str)
+    return (df.groupby(['crawl_date', 'academic_year', 'university_type'], observed=True)
+              .agg(programs=('fee/term', 'size'), avg_fee=('fee/term', 'mean'),
+                   total_admission=('total_admission', 'sum'))
+              .reset_index())
+
+def main():
+    parser = argparse.ArgumentParser(description='Append-only history of MainData.csv snapshots, partitioned by academic year and crawl date')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot = subparsers.add_parser('snapshot', help='Store the current MainData.csv as a new snapshot')
+    snapshot.add_argument('--input', default=DATA_FILE)
+    snapshot.add_argument('--rules', default=RULES_FILE)
+    snapshot.add_argument('--date', default=date.today().isoformat(), help='Crawl date (default today)')
+    snapshot.add_argument('--academic-year', type=int, required=True,
+                          help='TCAS academic year the crawl is for (not derivable from the crawl date)')
+    snapshot.add_argument('--root', default=HISTORY_DIR)
+
+    show = subparsers.add_parser('show', help='List snapshots, or print the history of one program')
+    show.add_argument('--program', help='program_key to print the time series for')
+    show.add_argument('--root', default=HISTORY_DIR)
+
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        academic_year = args.academic_year
+        df = load_csv(args.input, args.rules)
+        path = write_snapshot(df, academic_year, args.date, args.root)
+        print(f"Wrote {len(df)} rows to {path}")
+    elif args.program:
+        print(program_history(args.program, args.root).to_string(index=False))
+    else:
+        for academic_year, crawl_date in list_partitions(args.root):
+            print(f"{academic_year}  {crawl_date}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DATA_FILE = 'MainData.csv'
+STORE_FILE = 'MainData.arrow'
+RULES_FILE = 'university_types.csv'
+
+ADMISSION_COLS = ['r1', 'r2', 'r3', 'r4']
+CATEGORY_COLS = ['university', 'faculty', 'university_type']
+
+def load_university_rules(path=RULES_FILE):
+    """Load the keyword -> university type rules (first matching row wins, empty keyword = default)"""
+    return pd.read_csv(path, keep_default_na=False)
+
+def categorize_universities(names, rules):
+    """Classify university names with one substring test per rule row, evaluated once per unique name"""
+    codes, unique_names = pd.factorize(names.fillna(''))
+    unique_names = pd.Series(unique_names)
+
+    keyword_rules = rules[rules['keyword'] != '']
+    default = rules.loc[rules['keyword'] == '', 'university_type']
+    default = default.iloc[0] if len(default) else ''
+
+    # One condition per rule row in file order: np.select takes the first true one, so the first
+    # matching row wins even when a type's keywords are spread over several places in the file
+    conditions = [unique_names.str.contains(keyword, regex=False).to_numpy() for keyword in keyword_rules['keyword']]
+    choices = keyword_rules['university_type'].tolist()
+
+    unique_types = np.select(conditions, choices, default=default) if conditions else np.full(len(unique_names), default)
+    return pd.Series(unique_types[codes], index=names.index)
+
+def clean_data(df, rules):
+    """Clean the raw MainData table and add total_admission and university_type"""
+    # Clean column names
+    df.columns = df.columns.str.strip()
+
+    # Convert fee to numeric, handling any formatting issues
+    df['fee/term'] = pd.to_numeric(df['fee/term'], errors='coerce')
+
+    # Convert admission rounds to numeric, replacing '-' with 0
+    for col in ADMISSION_COLS:
+        df[col] = df[col].replace('-', 0)
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    # Calculate total admission slots
+    df['total_admission'] = df[ADMISSION_COLS].sum(axis=1)
+
+    # Categorize universities by type
+    df['university_type'] = categorize_universities(df['university'], rules)
+
+    # Repeated names are stored once per distinct value (dictionary encoded in the Arrow store)
+    for col in CATEGORY_COLS:
+        df[col] = df[col].astype('category')
+
+    return df
+
+def load_csv(path=DATA_FILE, rules_path=RULES_FILE):
+    """Read and clean MainData.csv"""
+    return clean_data(pd.read_csv(path), load_university_rules(rules_path))
+
+def write_store(df, path=STORE_FILE):
+    """Write the cleaned table as an uncompressed Arrow IPC file so readers can memory-map it"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + '.tmp'
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+def read_store(path=STORE_FILE):
+    """Memory-map the Arrow store; dictionary columns come back as pandas categoricals"""
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+def store_is_current(store_path=STORE_FILE, data_path=DATA_FILE, rules_path=RULES_FILE):
+    """True when the store exists and is newer than both the CSV and the type rules"""
+    if not os.path.exists(store_path):
+        return False
+    store_mtime = os.path.getmtime(store_path)
+    return all(not os.path.exists(path) or os.path.getmtime(path) <= store_mtime
+               for path in (data_path, rules_path))
+
+def main():
+    parser = argparse.ArgumentParser(description='Clean MainData.csv once and write the typed Arrow store for Dashboard.py')
+    parser.add_argument('--input', default=DATA_FILE)
+    parser.add_argument('--output', default=STORE_FILE)
+    parser.add_argument('--rules', default=RULES_FILE)
+    args = parser.parse_args()
+
+    df = load_csv(args.input, args.rules)
+    write_store(df, args.output)
+    print(f"Wrote {len(df)} rows to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+รวม programs_with_fee.csv กับ programs_with_rounds.csv เป็น MainData.csv โดยไม่ต้องจับคู่ด้วยมือ
+
+    python join_programs.py
+    python join_programs.py --unmatched unmatched.csv --threshold 0.8
+
+ลำดับการจับคู่: program_url/รหัสหลักสูตร (ถ้ามีทั้งสองไฟล์) -> ชื่อที่ normalize แล้วตรงกันทุกตัว
+-> fuzzy match เฉพาะหลักสูตรในมหาวิทยาลัยเดียวกัน (blocking) จึงไม่ต้องเทียบทุกคู่ทั้งไฟล์
+"""
+import argparse
+import csv
+import re
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import normalize_fee
+
+FIELDNAMES = ["university", "faculty", "field_name", "program_name", "fee/term", "r1", "r2", "r3", "r4"]
+ROUND_COLUMNS = ["r1", "r2", "r3", "r4"]
+
+NUMBER_PREFIX = re.compile(r"^\s*\d+\.\s*")
+# ชื่อปริญญาเต็ม -> ตัวย่อ (เขียนแบบไม่มีจุด) ใช้ทั้งชื่อเต็มและตัวย่อแบบมี/ไม่มีจุด
+DEGREES = [
+    ("วศบ", ["วิศวกรรมศาสตรบัณฑิต", "วศ.บ.", "วศ.บ"]),
+    ("วทบ", ["วิทยาศาสตรบัณฑิต", "วท.บ.", "วท.บ"]),
+    ("ทลบ", ["เทคโนโลยีบัณฑิต", "ทล.บ.", "ทล.บ"]),
+    ("คอบ", ["ครุศาสตร์อุตสาหกรรมบัณฑิต", "ค.อ.บ.", "ค.อ.บ"]),
+    ("บธบ", ["บริหารธุรกิจบัณฑิต", "บธ.บ.", "บธ.บ"]),
+]
+DEGREE_PATTERN = re.compile("|".join(re.escape(name) for _, names in DEGREES for name in names))
+DEGREE_ABBREVIATION = {name: abbreviation for abbreviation, names in DEGREES for name in names}
+# คำที่บางไฟล์มีบางไฟล์ไม่มี: "หลักสูตร" นำหน้าชื่อปริญญา, "สาขาวิชา"/"สาขา", "คณะ"
+FILLER = re.compile(r"^หลักสูตร(?!นานาชาติ)|สาขาวิชา|สาขา|^คณะ")
+PUNCTUATION = re.compile(r"[\s().,\-]+")
+
+
+def normalize_name(text):
+    """
+    ชื่อสำหรับเทียบกัน: ตัดเลขลำดับ, แทนชื่อปริญญาด้วยตัวย่อ, ตัดคำเติม เว้นวรรคและวงเล็บ
+    เช่น "หลักสูตรวิศวกรรมศาสตรบัณฑิต สาขาวิชาวิศวกรรมคอมพิวเตอร์" และ "วศ.บ สาขาวิชาวิศวกรรมคอมพิวเตอร์"
+    ได้ผลเป็น "วศบวิศวกรรมคอมพิวเตอร์" เหมือนกัน
+    """
+    text = NUMBER_PREFIX.sub("", text or "").strip()
+    text = DEGREE_PATTERN.sub(lambda match: DEGREE_ABBREVIATION[match.group()], text)
+    text = FILLER.sub("", text)
+    return PUNCTUATION.sub("", text).lower()
+
+
+def program_id(row):
+    """รหัสหลักสูตรจาก program_url เช่น .../programs/10010121300501A -> 10010121300501A"""
+    url = (row.get("program_url") or "").strip().rstrip("/")
+    return url.rsplit("/", 1)[-1] if url else None
+
+
+class Entry:
+    """แถวหนึ่งพร้อม key ที่ normalize ไว้แล้ว คำนวณครั้งเดียวต่อแถว"""
+
+    def __init__(self, index, row):
+        self.index = index
+        self.row = row
+        self.id = program_id(row)
+        self.university = normalize_name(row.get("university"))
+        self.faculty = normalize_name(row.get("faculty"))
+        self.program = normalize_name(row.get("program_name"))
+
+    @property
+    def key(self):
+        return self.university, self.faculty, self.program
+
+
+def similarity(a, b):
+    """คะแนน 0-1 ของสองแถวในมหาวิทยาลัยเดียวกัน ชื่อหลักสูตรมีน้ำหนักมากกว่าชื่อคณะ"""
+    return 0.8 * SequenceMatcher(None, a.program, b.program).ratio() + 0.2 * SequenceMatcher(None, a.faculty, b.faculty).ratio()
+
+
+def upper_bound(a, b):
+    """ขอบบนของ similarity ที่คำนวณเร็ว ใช้ตัดคู่ที่ไม่มีทางผ่าน threshold ก่อนเทียบจริง"""
+    return 0.8 * SequenceMatcher(None, a.program, b.program).real_quick_ratio() + 0.2
+
+
+def join(left_rows, right_rows, threshold=0.75):
+    """
+    จับคู่แถวแบบหนึ่งต่อหนึ่ง คืน (matches, unmatched_left, unmatched_right)
+    matches เป็น list ของ (left_row, right_row, method, score) เรียงตามลำดับใน left_rows
+    """
+    left = [Entry(i, row) for i, row in enumerate(left_rows)]
+    right = [Entry(i, row) for i, row in enumerate(right_rows)]
+    matched = {}
+    used = set()
+
+    def pair(a, b, method, score):
+        matched[a.index] = (b, method, score)
+        used.add(b.index)
+
+    # 1) รหัสหลักสูตรตรงกัน
+    by_id = {b.id: b for b in right if b.id}
+    for a in left:
+        b = by_id.get(a.id) if a.id else None
+        if b is not None and b.index not in used:
+            pair(a, b, "program_id", 1.0)
+
+    # 2) ชื่อที่ normalize แล้วตรงกันทุกตัว (ชื่อซ้ำกันจับคู่ตามลำดับที่พบ)
+    by_key = defaultdict(list)
+    for b in right:
+        if b.index not in used:
+            by_key[b.key].append(b)
+    for a in left:
+        if a.index not in matched and by_key.get(a.key):
+            pair(a, by_key[a.key].pop(0), "exact", 1.0)
+
+    # 3) fuzzy เฉพาะในมหาวิทยาลัยเดียวกัน จับคู่คะแนนสูงสุดก่อน
+    blocks = defaultdict(lambda: ([], []))
+    for a in left:
+        if a.index not in matched:
+            blocks[a.university][0].append(a)
+    for b in right:
+        if b.index not in used:
+            blocks[b.university][1].append(b)
+    for block_left, block_right in blocks.values():
+        candidates = []
+        for a in block_left:
+            for b in block_right:
+                if upper_bound(a, b) < threshold:
+                    continue
+                score = similarity(a, b)
+                if score >= threshold:
+                    candidates.append((score, a.index, b.index, a, b))
+        for score, _, _, a, b in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+            if a.index not in matched and b.index not in used:
+                pair(a, b, "fuzzy", score)
+
+    matches = [(a.row, matched[a.index][0].row, *matched[a.index][1:]) for a in left if a.index in matched]
+    unmatched_left = [a.row for a in left if a.index not in matched]
+    unmatched_right = [b.row for b in right if b.index not in used]
+    return matches, unmatched_left, unmatched_right
+
+
+def strip_number(text):
+    return NUMBER_PREFIX.sub("", text or "").strip()
+
+
+def main_row(fee_row, rounds_row):
+    """แถว MainData.csv: ชื่อจากไฟล์ค่าใช้จ่าย ค่าต่อเทอมที่แปลงแล้ว และจำนวนที่รับแต่ละรอบ"""
+    try:
+        fee = normalize_fee.parse_fee(fee_row.get("fee"))["fee_per_term"]
+        fee = int(fee) if fee.is_integer() else fee
+    except normalize_fee.FeeError:
+        fee = ""
+    return {
+        "university": fee_row["university"].strip(),
+        "faculty": strip_number(fee_row["faculty"]),
+        "field_name": strip_number(fee_row["field_name"]),
+        "program_name": fee_row["program_name"].strip(),
+        "fee/term": fee,
+        **{col: (rounds_row.get(col) or "-").strip() for col in ROUND_COLUMNS},
+    }
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f, skipinitialspace=True)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        return list(reader)
+
+
+def report(matches, unmatched_fee, unmatched_rounds, path=None):
+    methods = defaultdict(int)
+    for _, _, method, _ in matches:
+        methods[method] += 1
+    print(f"จับคู่ได้ {len(matches)} แถว (" + ", ".join(f"{m} {n}" for m, n in methods.items()) + ")")
+    for fee_row, rounds_row, method, score in matches:
+        if method == "fuzzy":
+            print(f"  ~ {score:.2f} {fee_row['university']}: {fee_row['program_name']} <-> {rounds_row['program_name']}")
+    for label, rows in (("programs_with_fee", unmatched_fee), ("programs_with_rounds", unmatched_rounds)):
+        for row in rows:
+            print(f"  ไม่พบคู่ใน {label}: {row.get('university')} / {row.get('faculty')} / {row.get('program_name')}")
+
+    if path:
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=["source", "university", "faculty", "field_name", "program_name"],
+                                    extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows({"source": "fee", **row} for row in unmatched_fee)
+            writer.writerows({"source": "rounds", **row} for row in unmatched_rounds)
+        print(f"รายการที่ไม่พบคู่อยู่ใน {path}")
+
+
+def main(args):
+    start = time.perf_counter()
+    fee_rows = list(normalize_fee.read_rows(args.fee))
+    rounds_rows = read_csv(args.rounds)
+    matches, unmatched_fee, unmatched_rounds = join(fee_rows, rounds_rows, args.threshold)
+
+    with open(args.output, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(main_row(fee_row, rounds_row) for fee_row, rounds_row, _, _ in matches)
+
+    report(matches, unmatched_fee, unmatched_rounds, args.unmatched)
+    print(f"บันทึกไฟล์ {args.output} ใน {time.perf_counter() - start:.2f} วินาที")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="รวมค่าใช้จ่ายและจำนวนที่รับของแต่ละหลักสูตรเป็น MainData.csv")
+    parser.add_argument("--fee", default="programs_with_fee.csv")
+    parser.add_argument("--rounds", default="programs_with_rounds.csv")
+    parser.add_argument("--output", default="MainData.csv")
+    parser.add_argument("--unmatched", help="ไฟล์ CSV สำหรับแถวที่ไม่พบคู่")
+    parser.add_argument("--threshold", type=float, default=0.75,
+                        help="คะแนนขั้นต่ำของ fuzzy match (0-1, ค่าเริ่มต้น 0.75)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,234 @@
+"""
+Headless load test for Dashboard.py: N simulated users, each a Streamlit AppTest session in this
+process (so they share st.cache_resource exactly like sessions on one server), replay randomized
+filter changes on the fee slider, type multiselect and minimum-admission input.
+
+    python load_test.py --users 50 --steps 20
+    python load_test.py --users 200 --steps 10 --think-time 0.5 --output load_test.json
+
+Reported: rerun latency percentiles (wall time of each AppTest.run), per-section p95 and cache
+hit ratios from the dashboard's profiling log, process CPU seconds and RSS growth per session.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from profiling import PROFILE_ENV, logger as profile_logger
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+
+def rss_bytes():
+    """Current resident set size of this process (0 where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def random_filters(rng, widgets):
+    """One randomized sidebar state within the ranges the dashboard offers"""
+    fee_min, fee_max, step = widgets['fee_min'], widgets['fee_max'], widgets['fee_step']
+    lo, hi = sorted(rng.randrange(fee_min, fee_max + 1, step) for _ in range(2))
+    types = rng.sample(widgets['types'], rng.randint(1, len(widgets['types'])))
+    min_admission = rng.choice([0, 0, 0, rng.randint(0, widgets['admission_max'])])
+    return (lo, max(hi, lo)), types, min_admission
+
+class Session:
+    """One simulated user: an AppTest for Dashboard.py plus the rerun times and failures it has seen"""
+
+    def __init__(self, user_id, seed, timeout):
+        self.user_id = user_id
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.reruns = []
+        self.errors = Counter()
+        self.app = self._new_app()
+
+    def _new_app(self):
+        from streamlit.testing.v1 import AppTest
+
+        return AppTest.from_file(DASHBOARD, default_timeout=self.timeout)
+
+    def rerun(self):
+        """Run the script once; returns False (and counts an error) if it raised or timed out"""
+        start = time.perf_counter()
+        error = None
+        try:
+            self.app.run()
+            if self.app.exception:
+                error = self.app.exception[0].message.splitlines()[0]
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        self.reruns.append(time.perf_counter() - start)
+        if error:
+            self.errors[error] += 1
+        return error is None
+
+    def ready(self):
+        """True when the last rerun rendered the sidebar filters (a failed rerun leaves them missing)"""
+        sidebar = self.app.sidebar
+        return bool(len(sidebar.slider) and len(sidebar.multiselect) and len(sidebar.number_input))
+
+    def widgets(self):
+        sidebar = self.app.sidebar
+        slider, types, admission = sidebar.slider[0], sidebar.multiselect[0], sidebar.number_input[0]
+        return {
+            'fee_min': int(slider.min), 'fee_max': int(slider.max), 'fee_step': int(slider.step or 1000),
+            'types': list(types.options), 'admission_max': int(admission.max),
+        }
+
+    def run(self, steps, widgets, think_time):
+        ok = self.rerun()
+        for _ in range(steps):
+            if ok and self.ready():
+                fee_range, types, min_admission = random_filters(self.rng, widgets)
+                sidebar = self.app.sidebar
+                sidebar.slider[0].set_value(fee_range)
+                sidebar.multiselect[0].set_value(types)
+                sidebar.number_input[0].set_value(min_admission)
+            else:
+                # Start over like a user reloading the page after an error
+                self.app = self._new_app()
+            ok = self.rerun()
+            if think_time:
+                time.sleep(self.rng.uniform(0, 2 * think_time))
+        return self
+
+def read_profile_log(path):
+    """Per-section timings and the last cumulative cache counters from the profiling JSON lines"""
+    sections, caches = {}, {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            for name, ms in entry.get('sections_ms', {}).items():
+                sections.setdefault(name, []).append(ms)
+            caches = entry.get('caches', caches)
+    return sections, caches
+
+def summarize(values_ms):
+    values = np.asarray(values_ms, dtype=float)
+    if not len(values):
+        return None
+    return {
+        'count': len(values),
+        **{f'p{q}': round(float(np.percentile(values, q)), 2) for q in (50, 90, 95, 99)},
+        'max': round(float(values.max()), 2),
+    }
+
+def load_test(args, log_path):
+    # Warm-up session: loads the data once (as the first visitor to a server would) and reads
+    # the widget ranges; baseline CPU and RSS are taken after it so only per-session cost remains
+    warmup = Session('warmup', args.seed, args.timeout)
+    if not warmup.rerun() or not warmup.ready():
+        raise SystemExit(f'Dashboard.py failed on the warm-up run: {warmup.app.exception}')
+    widgets = warmup.widgets()
+    warmup_ms = warmup.reruns[0] * 1000
+
+    peak_rss = baseline_rss = rss_bytes()
+    stop = threading.Event()
+
+    def sample_rss():
+        nonlocal peak_rss
+        while not stop.wait(0.2):
+            peak_rss = max(peak_rss, rss_bytes())
+
+    sampler = threading.Thread(target=sample_rss, name='rss-sampler', daemon=True)
+    sampler.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    sessions = [Session(user, args.seed + 1 + user, args.timeout) for user in range(args.users)]
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        list(pool.map(lambda session: session.run(args.steps, widgets, args.think_time), sessions))
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stop.set()
+    sampler.join()
+    peak_rss = max(peak_rss, rss_bytes())
+
+    reruns = [seconds * 1000 for session in sessions for seconds in session.reruns]
+    sections, caches = read_profile_log(log_path)
+    return {
+        'users': args.users,
+        'steps': args.steps,
+        'reruns': len(reruns),
+        'errors': sum(sum(session.errors.values()) for session in sessions),
+        'error_messages': dict(sum((session.errors for session in sessions), Counter()).most_common(10)),
+        'seconds': round(wall, 3),
+        'reruns_per_sec': round(len(reruns) / wall, 2) if wall else None,
+        'warmup_ms': round(warmup_ms, 2),
+        'rerun_ms': summarize(reruns),
+        'section_ms': {name: summarize(values) for name, values in sections.items()},
+        'cache_hit_ratio': {
+            name: round(counts['hits'] / (counts['hits'] + counts['misses']), 4)
+            if counts['hits'] + counts['misses'] else None
+            for name, counts in caches.items()
+        },
+        'caches': caches,
+        'cpu_seconds': round(cpu, 3),
+        'cpu_seconds_per_session': round(cpu / args.users, 4),
+        'cpu_utilization': round(cpu / wall, 3) if wall else None,
+        'baseline_rss_mb': round(baseline_rss / 2 ** 20, 1),
+        'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+        'rss_per_session_mb': round((peak_rss - baseline_rss) / 2 ** 20 / args.users, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate concurrent dashboard users with Streamlit AppTest')
+    parser.add_argument('--users', type=int, default=50, help='concurrent simulated sessions')
+    parser.add_argument('--steps', type=int, default=20, help='filter changes (reruns) per session')
+    parser.add_argument('--think-time', type=float, default=0.0, help='mean pause between reruns (seconds)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='AppTest timeout per rerun (seconds)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='load_test.json')
+    args = parser.parse_args()
+
+    # Turn on the dashboard's profiler and send its one-JSON-line-per-rerun log to a temp file
+    # (the app runs in this process, so it shares this profiling module and its logger)
+    log = tempfile.NamedTemporaryFile(prefix='dashboard-profile-', suffix='.jsonl', delete=False)
+    log.close()
+    os.environ[PROFILE_ENV] = 'timings'
+    handler = logging.FileHandler(log.name, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    previous, profile_logger.handlers = profile_logger.handlers, [handler]
+
+    try:
+        result = load_test(args, log.name)
+    finally:
+        profile_logger.handlers = previous
+        handler.close()
+        os.remove(log.name)
+
+    rerun = result['rerun_ms'] or {}
+    print(f"{result['users']} users, {result['reruns']} reruns in {result['seconds']} s "
+          f"({result['reruns_per_sec']}/s, {result['errors']} errors)")
+    print(f"rerun p50 {rerun.get('p50')} ms, p95 {rerun.get('p95')} ms, p99 {rerun.get('p99')} ms")
+    print(f"CPU {result['cpu_seconds_per_session']} s/session, RSS +{result['rss_per_session_mb']} MB/session")
+    print('cache hit ratio: ' + ', '.join(f'{name} {ratio}' for name, ratio in result['cache_hit_ratio'].items()))
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'result': result,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Saved {args.output}')
+
+if __name__ == '__main__':
+    main()
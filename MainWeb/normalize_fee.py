@@ -0,0 +1,305 @@
+"""
+แปลงข้อความค่าใช้จ่ายจากหน้า TCAS เป็นข้อมูลที่มีโครงสร้าง ทีละแถวแบบ generator
+
+    python normalize_fee.py --input programs_with_fee.csv --output programs_with_fee.normalized.csv
+    python normalize_fee.py --output programs_with_fee.parquet --rejected rejected_fees.csv
+"""
+import argparse
+import csv
+import re
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+
+FEE_COLUMN = "fee"
+OUTPUT_FIELDS = ["fee_amount", "fee_amount_max", "fee_unit", "fee_currency", "fee_per_term"]
+
+TERMS_PER_YEAR = 2
+# ค่าใช้จ่ายตลอดหลักสูตรเฉลี่ยต่อเทอม คิดเป็นหลักสูตร 4 ปี
+PROGRAM_TERMS = 4 * TERMS_PER_YEAR
+
+# \d ตรงกับเลขไทย ๐-๙ ด้วย และ float() แปลงเลขไทยได้ จึงไม่ต้องแปลงข้อความก่อน
+# ขึ้นต้นด้วย \d ตัวเดียว (ไม่ใช่ทางเลือก 25,500|25500) re จึงข้ามตำแหน่งที่ไม่ใช่ตัวเลขได้เร็ว
+NUMBER = r"\d(?:\d{0,2}(?:,\d{3})+|\d*)(?:\.\d+)?"
+# ตัวเลขพร้อมคำที่ตามหลัง อ่านด้วย regex เดียว: ตัวเลขที่ติดกับสกุลเงินคือจำนวนเงิน
+# ระยะเวลาเรียน (4 ปี, 8 ภาคการศึกษา) ชั้นปี และหน่วยกิต ไม่ใช่จำนวนเงิน
+AMOUNT = re.compile(
+    rf"(?P<amount>{NUMBER})"
+    r"(?:\s*(?:-|–|ถึง|(?i:to))\s*(?P<amount_max>\d[\d,]*(?:\.\d+)?))?"
+    r"(?:\s*(?P<scale>ล้าน|แสน|หมื่น|พัน))?"
+    r"(?:\s*(?:(?P<currency>บาท|฿|\$|ดอลลาร์|€|ยูโร|(?i:THB|USD|US\$|EUR))"
+    r"|(?P<years>ปี(?!ละ)|(?i:years?\b))|(?P<terms>(?:ภาคการศึกษา|ภาคเรียน|เทอม)(?!ละ))|(?P<other>ชั้นปี|หน่วยกิต)))?"
+)
+SCALES = {"ล้าน": 1_000_000, "แสน": 100_000, "หมื่น": 10_000, "พัน": 1_000}
+# คำที่อยู่หน้าตัวเลข ตรวจด้วย str.endswith ที่ตำแหน่งของตัวเลขโดยไม่ตัดข้อความ
+# ตัวเลขหลัง ...ละ (ภาคการศึกษาละ, ปีละ) หรือสกุลเงินคือจำนวนเงิน
+ANCHOR_BEFORE = ("ละ", "฿", "$", "€", "THB", "USD", "EUR", "thb", "usd", "eur")
+# ตัวเลขหลังปีการศึกษา ลำดับที่ หรือ พ.ศ. ไม่ใช่จำนวนเงิน
+NOT_AMOUNT_BEFORE = ("ปีการศึกษา", "ที่", "พ.ศ.", "ค.ศ.")
+ITEM_NUMBER = re.compile(r"[.)]\s")
+# ข้อความส่วนใหญ่เป็นแบบ "ภาคการศึกษาละ 25,500 บาท" หรือตัวเลขอย่างเดียว ตรวจด้วย fullmatch ครั้งเดียวแล้วจบ
+SIMPLE_FEE = re.compile(rf"(?:(?:(?P<year>ปี)|ภาคการศึกษา|ภาคเรียน|เทอม)ละ\s*)?(?P<amount>{NUMBER})(?:\s*บาท)?")
+KEYWORD_GROUPS = [
+    ("program", ["ตลอดหลักสูตร", "ทั้งหลักสูตร", "ตลอดการศึกษา", "entire program", "whole program"]),
+    ("year", ["ต่อปี", "ต่อ ปี", "ปีละ", "/ปี", "/ ปี", "per year", "annual"]),
+    ("term", ["ภาคการศึกษา", "ภาคเรียน", "เทอม", "/ภาค", "/ ภาค", "per term", "per semester", "semester"]),
+    # อัตราต่อเทอม (คำใน year เป็นอัตราต่อปีทั้งหมด) ถ้าไม่มีทั้งสองกลุ่ม จำนวนเงินที่มาคู่กับระยะเวลาเรียน
+    # (4 ปี 400,000 บาท) คือยอดรวมทั้งหลักสูตร
+    ("per_term", ["ภาคการศึกษาละ", "ภาคเรียนละ", "เทอมละ", "ภาคละ", "ต่อภาค", "ต่อ ภาค", "ต่อเทอม", "ต่อ เทอม",
+                  "/ภาค", "/ ภาค", "/เทอม", "/ เทอม", "per term", "per semester"]),
+    ("USD", ["usd", "us$", "$", "ดอลลาร์"]),
+    ("EUR", ["eur", "€", "ยูโร"]),
+    ("THB", ["thb", "บาท", "฿"]),
+    ("missing", ["ไม่พบข้อมูล", "ไม่สามารถดึงข้อมูลได้"]),
+]
+# ถ้าพบหลายหน่วย ใช้ตามลำดับนี้
+UNIT_PRIORITY = ["program", "year", "term"]
+UNIT_TERMS = {"term": 1, "year": TERMS_PER_YEAR, "program": PROGRAM_TERMS}
+CURRENCY_PRIORITY = ["USD", "EUR", "THB"]
+# คำบอกหน่วยและสกุลเงินอยู่ใน pattern เดียว ค้นครั้งเดียวบนข้อความตัวพิมพ์เล็ก ไม่ใช้ re.I และ named group
+# ต่อกลุ่ม เพราะทำให้ re ข้ามตำแหน่งด้วยตัวอักษรแรกไม่ได้ ช้าลงหลายเท่าบนข้อความไทย จึง map คำกลับเป็นกลุ่มเอง
+# term และ THB เป็นค่าเริ่มต้นที่ลำดับต่ำสุดอยู่แล้ว จึงไม่ต้องค้น ("ภาคการศึกษา" กับ "บาท" มีแทบทุกแถว)
+KEYWORD_GROUP = {word: name for name, words in KEYWORD_GROUPS if name not in ("term", "THB") for word in words}
+KEYWORDS = re.compile("|".join(re.escape(word) for word in KEYWORD_GROUP))
+
+
+class FeeError(ValueError):
+    pass
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def _amount(text):
+    """
+    เลือกจำนวนเงินจากตัวเลขในข้อความ: ข้ามปีการศึกษา ชั้นปี เลขข้อ และระยะเวลาเรียน
+    ใช้ตัวเลขที่ติดกับสกุลเงินหรือ ...ละ ถ้าไม่มีเลย ใช้ตัวเลขที่เหลือเพียงตัวเดียว (ไฟล์เก่ามีแต่ตัวเลข)
+    ถ้ามีจำนวนเงินหลายค่าที่ต่างกันจะ raise FeeError แทนการเดา
+    คืน (amount, amount_max, terms) โดย terms คือระยะเวลาเรียนเป็นจำนวนเทอม (4 ปี -> 8) หรือ None ถ้าไม่ระบุ
+    """
+    anchored, others, durations = set(), set(), set()
+    for match in AMOUNT.finditer(text):
+        amount, amount_max, scale, currency, years, terms, other = match.groups()
+        # ท้ายคำก่อนหน้าตัวเลข (ข้ามช่องว่าง) ใช้กับ endswith โดยไม่ต้องตัดข้อความ
+        before = match.start()
+        while before and text[before - 1].isspace():
+            before -= 1
+        anchor = text.endswith(ANCHOR_BEFORE, 0, before)
+        if not before:
+            # เลขข้อนำหน้า เช่น "1. ภาคการศึกษาละ ..." (ต้องมี . หรือ ) ตามด้วยช่องว่าง)
+            if not amount_max and ITEM_NUMBER.match(text, match.end("amount")):
+                continue
+        elif not anchor and (text.endswith(NOT_AMOUNT_BEFORE, 0, before) or text[before - 1] == ":"
+                             and text[:before - 1].rstrip().endswith(NOT_AMOUNT_BEFORE)):
+            continue
+
+        if years or terms:
+            # "4 ปี", "8 ภาคการศึกษา" คือระยะเวลาเรียน (ช่วง 4-5 ปี ไม่นับ)
+            if not amount_max and not scale:
+                count = _number(amount)
+                durations.add(count * TERMS_PER_YEAR if years else count)
+            continue
+        # "ปี 2568" ไม่ใช่จำนวนเงิน แต่ "4 ปี 400,000 บาท" ใช่ จึงข้ามเฉพาะเมื่อไม่มีสกุลเงินตามหลัง
+        if other or not currency and text.endswith("ปี", 0, before):
+            continue
+
+        multiplier = SCALES[scale] if scale else 1
+        amount = _number(amount) * multiplier
+        amount_max = _number(amount_max) * multiplier if amount_max else amount
+        if currency or anchor:
+            anchored.add((amount, amount_max))
+        else:
+            others.add((amount, amount_max))
+
+    candidates = anchored or others
+    if not candidates:
+        raise FeeError(f"ไม่พบตัวเลขในข้อความ: {text!r}")
+    if len(candidates) > 1:
+        raise FeeError(f"มีจำนวนเงินหลายค่า: {text!r}")
+    # ระยะเวลาที่ขัดกันเอง (เช่น 4 ปี กับ 10 ภาคการศึกษา) ไม่ใช้
+    terms = durations.pop() if len(durations) == 1 and min(durations) > 0 else None
+    return (*candidates.pop(), terms)
+
+
+@lru_cache(maxsize=65536)
+def parse_fee(text):
+    """
+    แปลงข้อความค่าใช้จ่าย เช่น "ภาคการศึกษาละ 25,500 บาท" เป็น dict ตาม OUTPUT_FIELDS
+    จำนวนเงินที่มาคู่กับระยะเวลาเรียนโดยไม่มีคำว่า ...ละ/ต่อ... เช่น "4 ปี 400,000 บาท" หรือ
+    "8 ภาคการศึกษา รวม 200,000 บาท" คือยอดทั้งหลักสูตร หารด้วยจำนวนเทอมตามระยะเวลานั้น
+    ข้อความเดียวกันซ้ำกันมาก ผลจึงถูก cache ไว้ต่อข้อความ; ถ้าแปลงไม่ได้จะ raise FeeError
+    """
+    text = (text or "").strip()
+    simple = SIMPLE_FEE.fullmatch(text)
+    if simple:
+        amount = _number(simple.group("amount"))
+        unit = "year" if simple.group("year") else "term"
+        if amount <= 0:
+            raise FeeError(f"จำนวนเงินไม่ถูกต้อง: {text!r}")
+        return {
+            "fee_amount": amount,
+            "fee_amount_max": amount,
+            "fee_unit": unit,
+            "fee_currency": "THB",
+            "fee_per_term": round(amount / UNIT_TERMS[unit], 2),
+        }
+
+    found = {KEYWORD_GROUP[word] for word in KEYWORDS.findall(text.lower())}
+    if "missing" in found or not text or text == "-":
+        raise FeeError(f"ไม่มีข้อมูลค่าใช้จ่าย: {text!r}")
+
+    amount, amount_max, terms = _amount(text)
+    if amount <= 0 or amount_max < amount:
+        raise FeeError(f"จำนวนเงินไม่ถูกต้อง: {text!r}")
+
+    unit = "term"
+    for name in UNIT_PRIORITY:
+        if name in found:
+            unit = name
+            break
+    if terms and (unit == "program" or "year" not in found and "per_term" not in found):
+        unit = "program"
+    else:
+        terms = UNIT_TERMS[unit]
+    currency = "THB"
+    for name in CURRENCY_PRIORITY:
+        if name in found:
+            currency = name
+            break
+
+    return {
+        "fee_amount": amount,
+        "fee_amount_max": amount_max,
+        "fee_unit": unit,
+        "fee_currency": currency,
+        "fee_per_term": round(amount / terms, 2),
+    }
+
+
+def normalize_rows(rows, rejected=None, fee_column=FEE_COLUMN):
+    """
+    generator: รับแถวจาก scraper ทีละแถว คืนแถวเดิมพร้อมคอลัมน์ OUTPUT_FIELDS
+    แถวที่แปลงไม่ได้จะไม่ถูกส่งต่อ แต่เก็บไว้ใน rejected (ถ้าส่ง list มา) พร้อมเหตุผล
+    """
+    for row in rows:
+        try:
+            fields = parse_fee(row.get(fee_column))
+        except FeeError as e:
+            if rejected is not None:
+                rejected.append({**row, "reason": str(e)})
+            continue
+        yield {**row, **fields}
+
+
+def read_rows(path, fee_column=FEE_COLUMN):
+    """
+    อ่าน CSV ที่ scraper เขียนไว้ทีละแถว รวมไฟล์เก่าที่ค่าใช้จ่ายแบบ 25,500 ไม่ได้ใส่ quote
+    (คอลัมน์ที่เกินมาจะถูกต่อกลับเป็นค่าใช้จ่าย) และชื่อคอลัมน์ที่มีช่องว่างนำหน้า
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, skipinitialspace=True)
+        header = [name.strip() for name in next(reader)]
+        # ไฟล์เก่าใช้ชื่อคอลัมน์ fee/term แทน fee
+        if fee_column not in header and "fee/term" in header:
+            header[header.index("fee/term")] = fee_column
+        fee_index = header.index(fee_column)
+        tail = len(header) - fee_index - 1
+        for values in reader:
+            if not values:
+                continue
+            extra = len(values) - len(header)
+            if extra > 0:
+                end = len(values) - tail
+                values = values[:fee_index] + [",".join(values[fee_index:end])] + values[end:]
+            yield dict(zip(header, (value.strip() for value in values)))
+
+
+def write_csv(rows, path, fieldnames):
+    """เขียน CSV ทุกค่าที่มี , หรือ " จะถูกใส่ quote ให้ อ่านกลับได้ครบคอลัมน์เสมอ"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_MINIMAL, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(rows, path, fieldnames, batch_size=50000):
+    """เขียน Parquet ทีละ batch ไม่ต้องถือทั้งไฟล์ไว้ในหน่วยความจำ"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.float64() if name in ("fee_amount", "fee_amount_max", "fee_per_term") else pa.string())
+                        for name in fieldnames])
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def report(rejected, path=None):
+    """สรุปแถวที่ถูกปฏิเสธตามเหตุผล และเขียนรายละเอียดลงไฟล์ถ้าระบุ path"""
+    if not rejected:
+        print("ไม่มีแถวที่ถูกปฏิเสธ")
+        return
+    reasons = Counter(reason.split(":")[0] for reason in (row["reason"] for row in rejected))
+    print(f"ถูกปฏิเสธ {len(rejected)} แถว:")
+    for reason, count in reasons.most_common():
+        print(f"  - {reason}: {count}")
+    if path:
+        write_csv(rejected, path, list(rejected[0].keys()))
+        print(f"รายละเอียดอยู่ใน {path}")
+
+
+def main(args):
+    start = time.perf_counter()
+    rows = read_rows(args.input)
+    first = next(rows, None)
+    if first is None:
+        print(f"ไม่มีข้อมูลใน {args.input}")
+        return
+
+    def all_rows():
+        yield first
+        yield from rows
+
+    rejected = []
+    fieldnames = list(first.keys()) + OUTPUT_FIELDS
+    normalized = normalize_rows(all_rows(), rejected)
+    if args.output.endswith(".parquet"):
+        count = write_parquet(normalized, args.output, fieldnames)
+    else:
+        count = write_csv(normalized, args.output, fieldnames)
+
+    elapsed = time.perf_counter() - start
+    print(f"แปลงค่าใช้จ่าย {count} แถว ใน {elapsed:.3f} วินาที -> {args.output}")
+    report(rejected, args.rejected)
+    if rejected and args.strict:
+        sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="แปลงข้อความค่าใช้จ่ายเป็นจำนวนเงิน หน่วย (ต่อเทอม/ต่อปี/ทั้งหลักสูตร) และสกุลเงิน")
+    parser.add_argument("--input", default="programs_with_fee.csv")
+    parser.add_argument("--output", default="programs_with_fee.normalized.csv",
+                        help="ไฟล์ผลลัพธ์ .csv หรือ .parquet")
+    parser.add_argument("--rejected", help="ไฟล์ CSV สำหรับแถวที่แปลงไม่ได้ พร้อมเหตุผล")
+    parser.add_argument("--strict", action="store_true", help="จบด้วย exit code 1 ถ้ามีแถวที่ถูกปฏิเสธ")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
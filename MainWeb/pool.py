@@ -0,0 +1,121 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+# ใช้แค่ข้อความใน dl และ li#rN จึงไม่ต้องโหลดรูป ฟอนต์ CSS และสคริปต์วิเคราะห์สถิติ
+BLOCKED_RESOURCE_TYPES = {"image", "imageset", "media", "font", "stylesheet", "texttrack", "object", "beacon", "csp_report"}
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net",
+                 "facebook.net", "facebook.com", "hotjar.com", "clarity.ms")
+
+
+class TrafficStats:
+    """
+    นับจำนวน request และ byte ที่ browser โหลดจริง รวมทั้ง request ที่ถูกบล็อก
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+
+    def watch(self, context):
+        context.on("requestfinished", self._on_finished)
+
+    async def _on_finished(self, request):
+        sizes = await request.sizes()
+        self.requests += 1
+        self.bytes += sizes["responseHeadersSize"] + max(sizes["responseBodySize"], 0)
+
+    def report(self, pages):
+        per_page = self.bytes / pages if pages else 0
+        print(f"browser โหลด {self.requests} request, {self.bytes:,} bytes "
+              f"(เฉลี่ย {per_page:,.0f} bytes/หน้า), บล็อก {self.blocked} request")
+
+
+async def block_resources(route, stats=None):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        if stats is not None:
+            stats.blocked += 1
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@asynccontextmanager
+async def browser_page(browser, stats=None, block=True):
+    """
+    เปิด browser context ใหม่พร้อม page หนึ่งหน้า แล้วปิด context เมื่อใช้งานเสร็จ
+    ถ้า block เป็น True จะยกเลิก request ที่ไม่ใช่ตัวเอกสาร (รูป ฟอนต์ CSS analytics)
+    """
+    context = await browser.new_context(service_workers="block")
+    if block:
+        await context.route("**/*", lambda route: block_resources(route, stats))
+    if stats is not None:
+        stats.watch(context)
+    try:
+        yield await context.new_page()
+    finally:
+        await context.close()
+
+
+async def run_pool(open_worker, rows, scrape_row, scheduler, on_error=None):
+    """
+    ดึงข้อมูลทุกแถวใน rows พร้อมกันหลาย worker
+    open_worker() ต้องคืน async context manager ที่ให้ทรัพยากรของ worker เช่น page
+    แต่ละ worker หยิบงานจาก asyncio.Queue แล้วเรียก scrape_row(resource, row) ผ่าน scheduler
+    (rate limit ต่อ host, retry แบบ backoff, จำนวนพร้อมกันแบบ AIMD)
+    แถวที่ยัง error หลัง retry ครบจะถูกย้ายไปคิวท้ายรอบแล้วลองอีกครั้ง ถ้ายังไม่ได้จะใช้ on_error(row, error)
+    ผลลัพธ์ที่คืนกลับเรียงตามลำดับของ rows เดิมเสมอ
+    """
+    queue = asyncio.Queue()
+    for index, row in enumerate(rows):
+        queue.put_nowait((index, row))
+
+    results = [None] * len(rows)
+    durations = []
+    retry_later = []
+
+    async def scrape(resource, index, row):
+        row_start = time.perf_counter()
+        results[index] = await scheduler.call(row["program_url"], lambda: scrape_row(resource, row))
+        durations.append(time.perf_counter() - row_start)
+
+    async def worker(final_pass):
+        async with open_worker() as resource:
+            while True:
+                try:
+                    index, row = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await scrape(resource, index, row)
+                except Exception as e:
+                    if not final_pass:
+                        retry_later.append((index, row))
+                        continue
+                    print(f"Error: {row['program_url']} {e}")
+                    if on_error is not None:
+                        results[index] = on_error(row, e)
+
+    async def run_workers(count, final_pass):
+        workers = max(1, min(scheduler.max_concurrency, count))
+        await asyncio.gather(*(worker(final_pass) for _ in range(workers)))
+        return workers
+
+    start = time.perf_counter()
+    workers = await run_workers(len(rows), final_pass=False)
+    if retry_later:
+        print(f"ลองแถวที่ error อีกครั้งท้ายรอบ: {len(retry_later)} แถว")
+        for item in retry_later:
+            queue.put_nowait(item)
+        await run_workers(len(retry_later), final_pass=True)
+    elapsed = time.perf_counter() - start
+
+    rate = len(rows) / elapsed if elapsed > 0 else 0.0
+    average = sum(durations) / len(durations) if durations else 0.0
+    print(f"ดึงข้อมูล {len(rows)} แถว ด้วย {workers} worker ใช้เวลา {elapsed:.1f} วินาที "
+          f"({rate:.2f} แถว/วินาที, เฉลี่ย {average * 1000:.0f} ms/หน้า)")
+    scheduler.report()
+    return results
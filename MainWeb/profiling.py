@@ -0,0 +1,129 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+PROFILE_LOG_ENV = 'DASHBOARD_PROFILE_LOG'
+PROFILE_PARAM = 'profile'
+MODES = {'1': 'timings', 'true': 'timings', 'on': 'timings', 'timings': 'timings',
+         'cprofile': 'cprofile', 'pyinstrument': 'pyinstrument'}
+
+logger = logging.getLogger('dashboard.profile')
+if not logger.handlers:
+    log_path = os.environ.get(PROFILE_LOG_ENV)
+    handler = logging.FileHandler(log_path, encoding='utf-8') if log_path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+class CacheStats:
+    """Process-wide hit/miss counters for caches that do not count themselves (e.g. st.cache_resource)"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def call(self, name):
+        with self._lock:
+            self._counts.setdefault(name, [0, 0])[0] += 1
+
+    def miss(self, name):
+        with self._lock:
+            self._counts.setdefault(name, [0, 0])[1] += 1
+
+    def snapshot(self):
+        """{name: (hits, misses)} where hits = calls that did not miss"""
+        with self._lock:
+            return {name: (max(calls - misses, 0), misses) for name, (calls, misses) in self._counts.items()}
+
+CACHE_STATS = CacheStats()
+
+def profile_mode():
+    """Profiling mode from ?profile=... (takes precedence) or DASHBOARD_PROFILE; None when disabled"""
+    value = st.query_params.get(PROFILE_PARAM) or os.environ.get(PROFILE_ENV) or ''
+    return MODES.get(value.strip().lower())
+
+class Profiler:
+    """
+    Lap timer for one rerun: lap(name) records the time since the previous lap, so sections are
+    marked with one call after each block. Disabled profilers cost one attribute check per lap.
+    In cprofile/pyinstrument mode the whole rerun is also captured by that profiler.
+    """
+
+    def __init__(self, mode=None):
+        self.mode = mode
+        self.enabled = mode is not None
+        self.laps = []
+        self._capture = None
+        self._started = self._last = time.perf_counter()
+        if mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as Instrument
+                self._capture = Instrument()
+            except ImportError:
+                self.mode = 'cprofile'
+        if self.mode == 'cprofile':
+            self._capture = cProfile.Profile()
+        if self.mode == 'pyinstrument':
+            self._capture.start()
+        elif self.mode == 'cprofile':
+            self._capture.enable()
+
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.laps.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def _capture_report(self):
+        if self._capture is None:
+            return None
+        if self.mode == 'pyinstrument':
+            self._capture.stop()
+            return self._capture.output_text(unicode=True, color=False)
+        self._capture.disable()
+        out = io.StringIO()
+        pstats.Stats(self._capture, stream=out).sort_stats('cumulative').print_stats(30)
+        return out.getvalue()
+
+    def finish(self, caches=None, **context):
+        """Stop timing, write one JSON log line and render the debug expander"""
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self._started) * 1000
+        capture = self._capture_report()
+        caches = {**{name: {'hits': hits, 'misses': misses} for name, (hits, misses) in CACHE_STATS.snapshot().items()},
+                  **{name: {'hits': cache.hits, 'misses': cache.misses} for name, cache in (caches or {}).items()}}
+
+        logger.info(json.dumps({
+            'event': 'dashboard_rerun',
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'total_ms': round(total, 2),
+            'sections_ms': {name: round(ms, 2) for name, ms in self.laps},
+            'caches': caches,
+            **context,
+        }, ensure_ascii=False, default=str))
+
+        with st.expander(f"🛠 Debug: rerun {total:,.0f} ms", expanded=False):
+            st.dataframe(
+                pd.DataFrame(self.laps, columns=['section', 'ms']).round(2),
+                use_container_width=True, hide_index=True
+            )
+            st.dataframe(
+                pd.DataFrame([{'cache': name, **counts} for name, counts in caches.items()]),
+                use_container_width=True, hide_index=True
+            )
+            st.json(context)
+            if capture:
+                st.code(capture, language='text')
@@ -0,0 +1,268 @@
+import argparse
+import io
+import json
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from aggregates import compute_aggregates
+from charts import build_charts
+from filter_index import FilterIndex, LRUCache, filter_key
+from recommend import DEFAULT_WEIGHTS, Recommender, weight_key
+from table_view import DETAIL_COLUMNS, SortIndex
+
+TOP_QUERIES = {
+    'cheapest': ('fee/term', False),
+    'most_admission': ('total_admission', True),
+}
+LATENCY_WINDOW = 2048
+
+logger = logging.getLogger('query_service')
+
+class LatencyLog:
+    """Rolling window of query latencies per query name, for p50/p95/p99 under load"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self):
+        """{name: {'count', 'p50_ms', 'p95_ms', 'p99_ms'}} over the current window"""
+        with self._lock:
+            samples = {name: np.array(values) * 1000 for name, values in self._samples.items()}
+        return {
+            name: {
+                'count': len(values),
+                **{f'p{q}_ms': round(float(np.percentile(values, q)), 3) for q in (50, 95, 99)},
+            }
+            for name, values in samples.items()
+        }
+
+class QueryService:
+    """
+    Shared, read-only query layer over one dataset version. One instance per process holds the
+    frame and every index built from it; sessions ask for row positions, aggregates, charts and
+    top-N lists instead of slicing their own copies. All results are cached per filter tuple,
+    and the filtered frame is only materialized on a cache miss.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.index = FilterIndex(df)
+        self.sort_index = SortIndex(df)
+        self.aggregates = LRUCache(256)
+        self.charts = LRUCache(64)
+        self.tops = LRUCache(256)
+        self.recommender = Recommender(df)
+        self.recommendations = LRUCache(256)
+        self.latency = LatencyLog()
+
+    def _timed(self, name, compute):
+        start = time.perf_counter()
+        try:
+            return compute()
+        finally:
+            self.latency.record(name, time.perf_counter() - start)
+
+    def filter(self, min_fee, max_fee, university_types, min_admission):
+        """Row positions matching the sidebar filters (read-only array, in original order)"""
+        return self._timed('filter', lambda: self.index.query(min_fee, max_fee, university_types, min_admission))
+
+    def aggregate(self, min_fee, max_fee, university_types, min_admission):
+        key = filter_key(min_fee, max_fee, university_types, min_admission)
+        rows = self.filter(*key)
+        return self._timed('aggregate', lambda: self.aggregates.get_or_compute(
+            key, lambda: compute_aggregates(self.df.iloc[rows])
+        ))
+
+    def chart_figures(self, min_fee, max_fee, university_types, min_admission):
+        key = filter_key(min_fee, max_fee, university_types, min_admission)
+        agg = self.aggregate(*key)
+        rows = self.filter(*key)
+        return self._timed('charts', lambda: self.charts.get_or_compute(
+            key, lambda: build_charts(self.df.iloc[rows], agg)
+        ))
+
+    def top(self, query, n, min_fee, max_fee, university_types, min_admission):
+        """
+        Row positions of the first n filtered rows for a TOP_QUERIES name, read off the global
+        per-column order rather than an nsmallest/nlargest over the filtered frame
+        """
+        column, descending = TOP_QUERIES[query]
+        key = filter_key(min_fee, max_fee, university_types, min_admission)
+        rows = self.filter(*key)
+
+        def compute():
+            ordered = self.sort_index.sorted_rows(rows, column, descending)[:n]
+            ordered.setflags(write=False)
+            return ordered
+
+        return self._timed('top', lambda: self.tops.get_or_compute((query, n, key), compute))
+
+    def recommend(self, weights, type_weights, k, min_fee, max_fee, university_types, min_admission):
+        """(row positions, scores) of the k best filtered rows for one weight vector, cached per weights and filters"""
+        key = filter_key(min_fee, max_fee, university_types, min_admission)
+        weights = weight_key(weights, type_weights)
+        rows = self.filter(*key)
+        return self._timed('recommend', lambda: self.recommendations.get_or_compute(
+            (weights, k, key), lambda: self.recommender.top_k(weights, k, rows)
+        ))
+
+    def sorted_rows(self, rows, column, descending=False):
+        return self._timed('sort', lambda: self.sort_index.sorted_rows(rows, column, descending))
+
+    def caches(self):
+        """Result caches by name, in the shape profiling.Profiler.finish expects"""
+        return {
+            'filter_index': self.index.cache,
+            'aggregates': self.aggregates,
+            'charts': self.charts,
+            'top': self.tops,
+            'recommend': self.recommendations,
+        }
+
+    def records(self, rows, columns=None):
+        """Compact JSON payload: column names once, then one list of values per row"""
+        columns = columns or list(DETAIL_COLUMNS)
+        table = self.df.iloc[rows][columns]
+        values = table.astype(object).where(table.notna(), None).to_numpy().tolist()
+        return {'columns': columns, 'rows': values}
+
+    def arrow(self, rows, columns=None):
+        """Arrow IPC stream bytes for the given rows (pyarrow is only needed for this format)"""
+        import pyarrow as pa
+
+        columns = columns or list(DETAIL_COLUMNS)
+        table = pa.Table.from_pandas(self.df.iloc[rows][columns], preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+def aggregate_payload(agg):
+    """JSON-safe copy of compute_aggregates output"""
+    def plain(value):
+        if isinstance(value, (np.integer, np.floating)):
+            value = value.item()
+        return None if isinstance(value, float) and np.isnan(value) else value
+
+    payload = {key: plain(value) for key, value in agg.items() if key not in ('by_type', 'round_sums')}
+    payload['round_sums'] = {col: plain(value) for col, value in agg['round_sums'].items()}
+    payload['by_type'] = {
+        university_type: {col: plain(value) for col, value in row.items()}
+        for university_type, row in agg['by_type'].to_dict('index').items()
+    }
+    return payload
+
+def parse_filters(params, df):
+    """Filter tuple from query-string params; missing values default to the whole dataset"""
+    def number(name, default):
+        return float(params[name][0]) if name in params else default
+
+    types = params.get('type') or df['university_type'].astype(str).unique().tolist()
+    return (
+        number('min_fee', float(df['fee/term'].min())),
+        number('max_fee', float(df['fee/term'].max())),
+        types,
+        number('min_admission', 0),
+    )
+
+def top_n(params):
+    """Result count from the n param (default 10); n < 1 is a ValueError, answered with 400"""
+    n = int(params.get('n', ['10'])[0])
+    if n < 1:
+        raise ValueError(f'n must be at least 1, got {n}')
+    return n
+
+def make_app(get_service):
+    """
+    Minimal ASGI app over get_service() (called per request, so a DataWatcher can swap versions):
+
+        GET /filter?min_fee=&max_fee=&type=...&min_admission=   count and row positions
+        GET /aggregate?...                                       compute_aggregates as JSON
+        GET /top?query=cheapest|most_admission&n=10&format=json|arrow&...
+        GET /recommend?w_fee=1&w_total_admission=1&w_r1=0&...&prefer=<type>&prefer_weight=1&n=10&...
+        GET /stats                                               latency percentiles and cache hit counts
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        start = time.perf_counter()
+        params = parse_qs(scope.get('query_string', b'').decode())
+        path = scope['path'].rstrip('/')
+        content_type, status = 'application/json', 200
+        service = None
+        try:
+            service = get_service()
+            filters = parse_filters(params, service.df)
+            if path == '/filter':
+                rows = service.filter(*filters)
+                body = {'count': len(rows), 'rows': rows.tolist()}
+            elif path == '/aggregate':
+                body = aggregate_payload(service.aggregate(*filters))
+            elif path == '/top':
+                query = params.get('query', ['cheapest'])[0]
+                rows = service.top(query, top_n(params), *filters)
+                if params.get('format', ['json'])[0] == 'arrow':
+                    content_type, body = 'application/vnd.apache.arrow.stream', service.arrow(rows)
+                else:
+                    body = service.records(rows)
+            elif path == '/recommend':
+                weights = {name: float(params.get(f'w_{name}', [DEFAULT_WEIGHTS[name]])[0]) for name in DEFAULT_WEIGHTS}
+                type_weights = {t: float(params.get('prefer_weight', ['1'])[0]) for t in params.get('prefer', [])}
+                rows, scores = service.recommend(weights, type_weights, top_n(params), *filters)
+                body = {**service.records(rows), 'scores': [round(float(score), 4) for score in scores]}
+            elif path == '/stats':
+                body = {
+                    'rows': len(service.df),
+                    'latency': service.latency.summary(),
+                    'caches': {name: {'hits': cache.hits, 'misses': cache.misses}
+                               for name, cache in service.caches().items()},
+                }
+            else:
+                status, body = 404, {'error': f'unknown path {path}'}
+        except (KeyError, ValueError) as e:
+            status, body = 400, {'error': str(e)}
+        except Exception as e:
+            # Any other failure still gets a response (and a latency sample) instead of a hung request
+            logger.exception('query %s failed', path)
+            content_type, status, body = 'application/json', 500, {'error': f'{type(e).__name__}: {e}'}
+
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode()
+        if service is not None:
+            service.latency.record(f'http {path or "/"} {status}', time.perf_counter() - start)
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', content_type.encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    return app
+
+def main():
+    from freshness import DataWatcher
+    from ingest import DATA_FILE, RULES_FILE, STORE_FILE, load_csv, read_store, store_is_current
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serve dashboard filter/aggregate/top-N queries over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    watcher = DataWatcher(
+        [DATA_FILE, RULES_FILE, STORE_FILE],
+        lambda: read_store() if store_is_current() else load_csv(),
+        lambda df: {'service': QueryService(df)},
+    )
+    uvicorn.run(make_app(lambda: watcher.current.resources['service']), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import numpy as np
+
+from aggregates import ROUND_COLS
+
+# Weighted features: fee counts against a program (cheaper scores higher), quotas count for it
+FEATURES = {
+    'fee': 'fee/term',
+    'total_admission': 'total_admission',
+    **{col: col for col in ROUND_COLS},
+}
+DEFAULT_WEIGHTS = {'fee': 1.0, 'total_admission': 1.0, 'r1': 0.0, 'r2': 0.0, 'r3': 0.0, 'r4': 0.0}
+
+def weight_key(weights, type_weights=None):
+    """Hashable key for one weight vector; features left out weigh 0"""
+    return (
+        tuple(float(weights.get(name, 0.0)) for name in FEATURES),
+        tuple(sorted((str(t), float(w)) for t, w in (type_weights or {}).items() if w)),
+    )
+
+def _scaled(values, invert=False):
+    """Min-max scale to [0, 1]; missing values score 0"""
+    values = values.astype(float)
+    present = ~np.isnan(values)
+    scaled = np.zeros(len(values), dtype=float)
+    if present.any():
+        lo, hi = values[present].min(), values[present].max()
+        scaled[present] = (values[present] - lo) / (hi - lo) if hi > lo else 1.0
+        if invert:
+            scaled[present] = 1.0 - scaled[present]
+    return scaled
+
+class Recommender:
+    """
+    Weighted top-K ranking over one dataset. Every feature is scaled to [0, 1] once into a
+    rows x features matrix, so a weight vector is scored with one matrix-vector product plus
+    a per-type bonus, and the top K are picked with argpartition instead of a full sort.
+    """
+
+    def __init__(self, df):
+        columns = []
+        for name, column in FEATURES.items():
+            values = df[column].to_numpy(dtype=float)
+            if name == 'fee':
+                columns.append(_scaled(values, invert=True))
+            else:
+                # log-scaled so a few very large intakes do not flatten the rest
+                columns.append(_scaled(np.log1p(np.clip(values, 0, None))))
+        self.matrix = np.column_stack(columns)
+        self.matrix.setflags(write=False)
+        self.types, self.type_codes = np.unique(df['university_type'].astype(str).to_numpy(), return_inverse=True)
+        self.size = len(df)
+
+    def scores(self, key):
+        """Score of every row for a weight_key; weights are normalized so scores stay in [0, 1]"""
+        feature_weights, type_weights = key
+        w = np.asarray(feature_weights)
+        bonus = np.zeros(len(self.types))
+        for university_type, weight in type_weights:
+            position = np.searchsorted(self.types, university_type)
+            if position < len(self.types) and self.types[position] == university_type:
+                bonus[position] = weight
+        total = np.abs(w).sum() + np.abs(bonus).max(initial=0.0)
+        if not total:
+            return np.zeros(self.size)
+        return (self.matrix @ w + bonus[self.type_codes]) / total
+
+    def top_k(self, key, k=10, rows=None):
+        """
+        (row positions, scores) of the k best-scoring rows, best first; rows restricts the
+        candidates (e.g. the sidebar filter result). Ties, including at the K-th place, go to the earlier row.
+        k is capped at the number of candidates, and k <= 0 returns empty arrays.
+        """
+        candidates = np.arange(self.size) if rows is None else np.asarray(rows)
+        if k <= 0 or not len(candidates):
+            empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+            for array in empty:
+                array.setflags(write=False)
+            return empty
+        k = min(k, len(candidates))
+        scores = self.scores(key)
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            # argpartition finds the K-th best score in O(n); everything above it is in, and the
+            # remaining places are filled with the earliest rows tied at that score
+            kth = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            above = np.flatnonzero(candidate_scores > kth)
+            tied = np.flatnonzero(candidate_scores == kth)[:k - len(above)]
+            best = np.concatenate([above, tied])
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.lexsort((candidates[best], -candidate_scores[best]))]
+        top_rows, top_scores = candidates[best], candidate_scores[best]
+        top_rows.setflags(write=False)
+        top_scores.setflags(write=False)
+        return top_rows, top_scores
@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    จำกัดอัตรา request ต่อ host: เติม token rate ตัวต่อวินาที เก็บได้สูงสุด burst ตัว
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveLimit:
+    """
+    จำกัดจำนวนงานที่ทำพร้อมกันแบบ AIMD
+    ตอบเร็วครบหนึ่งรอบของ limit -> เพิ่มทีละ 1, error หรือช้ากว่า target_latency -> ลดลงครึ่งหนึ่ง
+    """
+
+    def __init__(self, initial, maximum, target_latency, minimum=1):
+        self.limit = max(minimum, initial)
+        self.minimum = minimum
+        self.maximum = max(maximum, self.limit)
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.peak = self.limit
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency, ok):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if ok and latency <= self.target_latency:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self._successes = 0
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.peak = max(self.peak, self.limit)
+            elif now - self._last_decrease >= self.target_latency:
+                # ลดครั้งเดียวต่อช่วง target_latency ไม่ให้ error ที่เกิดพร้อมกันหลายงานลด limit ซ้ำจนเหลือ 1
+                self._successes = 0
+                self._last_decrease = now
+                self.limit = max(self.minimum, self.limit // 2)
+            self._condition.notify_all()
+
+
+class Scheduler:
+    """
+    ตัวจัดคิว request ที่ใช้ร่วมกันทุก crawler
+    - token bucket ต่อ host
+    - retry ด้วย exponential backoff + jitter
+    - จำนวนงานพร้อมกันปรับตาม latency และ error (AIMD)
+    """
+
+    def __init__(self, concurrency=4, max_concurrency=None, rate=4.0, burst=None,
+                 max_retries=3, base_delay=1.0, max_delay=30.0, target_latency=5.0):
+        self.limit = AdaptiveLimit(concurrency, max_concurrency or concurrency * 2, target_latency)
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.buckets = {}
+        self.retries = 0
+        self.failures = 0
+        # เวลาที่แต่ละ request สำเร็จใช้ (วินาที) สำหรับ bench.py
+        self.latencies = []
+
+    @property
+    def max_concurrency(self):
+        return self.limit.maximum
+
+    def backoff(self, attempt):
+        """
+        full jitter: สุ่มระหว่าง 0 ถึง base_delay * 2^attempt (ไม่เกิน max_delay)
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    async def call(self, url, make_request):
+        """
+        เรียก make_request() (คืน coroutine) สำหรับ url ภายใต้ rate limit และ AIMD
+        ถ้า error จะลองใหม่สูงสุด max_retries ครั้ง แล้วส่ง exception สุดท้ายต่อให้ผู้เรียก
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.bucket(url).acquire()
+            await self.limit.acquire()
+            start = time.monotonic()
+            try:
+                result = await make_request()
+            except Exception as e:
+                await self.limit.release(time.monotonic() - start, ok=False)
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                delay = self.backoff(attempt)
+                print(f"ลองใหม่ครั้งที่ {attempt + 1} ใน {delay:.1f} วินาที: {url} ({e})")
+                await asyncio.sleep(delay)
+            else:
+                latency = time.monotonic() - start
+                self.latencies.append(latency)
+                await self.limit.release(latency, ok=True)
+                return result
+
+    def report(self):
+        print(f"scheduler: retry {self.retries} ครั้ง, ล้มเหลว {self.failures} ครั้ง, "
+              f"concurrency ตอนจบ {self.limit.limit} (สูงสุด {self.limit.peak})")
+
+
+def add_arguments(parser):
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="จำนวนหน้าที่ดึงพร้อมกันตอนเริ่ม (ค่าเริ่มต้น 4)")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="จำนวนพร้อมกันสูงสุดที่ AIMD ปรับขึ้นได้ (ค่าเริ่มต้น 2 เท่าของ --concurrency)")
+    parser.add_argument("--rate", type=float, default=4.0,
+                        help="จำนวน request ต่อวินาทีต่อ host (ค่าเริ่มต้น 4)")
+    parser.add_argument("--max-retries", type=int, default=3,
+                        help="จำนวนครั้งที่ลองใหม่เมื่อ error ก่อนย้ายไปคิวท้ายรอบ (ค่าเริ่มต้น 3)")
+    parser.add_argument("--target-latency", type=float, default=5.0,
+                        help="ถ้าหน้าใช้เวลานานกว่านี้ (วินาที) จะลดจำนวนพร้อมกันลง (ค่าเริ่มต้น 5)")
+
+
+def from_args(args):
+    return Scheduler(concurrency=args.concurrency, max_concurrency=args.max_concurrency, rate=args.rate,
+                     max_retries=args.max_retries, target_latency=args.target_latency)
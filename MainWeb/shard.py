@@ -0,0 +1,210 @@
+"""
+แบ่ง programs_engineering.csv เป็น shard แล้วให้หลายโปรเซสดึงพร้อมกัน แต่ละโปรเซสมี event loop
+และ browser ของตัวเอง (ใช้ได้หลาย core) จากนั้นรวมผลเป็นไฟล์เดียวตามลำดับเดิม
+
+    python shard.py --workers 4 --shards 8 --by university --backend browser
+    python shard.py --workers 4 --by hash --output MainData.parquet
+
+ทุก worker บันทึกผลลง checkpoint เดียวกัน (SQLite WAL) ถ้า worker ตายกลางทาง shard นั้นจะถูกส่งให้
+worker ใหม่ ซึ่งข้ามแถวที่บันทึกไว้แล้วและดึงเฉพาะแถวที่เหลือ
+แต่ละ worker มี rate limit ของตัวเอง อัตรารวมต่อ host จึงเป็น --rate x --workers
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import time
+import zlib
+
+import checkpoint as ckpt
+import scheduler as sched
+from crawl import FIELDNAMES, crawl, failed_row
+
+ROUND_COLUMNS = ["r1", "r2", "r3", "r4"]
+
+
+def split_rows(rows, shards, by="university"):
+    """
+    แบ่ง rows เป็น shards กลุ่ม คืน list ของ [(ลำดับใน rows, row), ...]
+    by="university": หลักสูตรของมหาวิทยาลัยเดียวกันอยู่ shard เดียวกัน (ใส่กลุ่มใหญ่สุดลง shard ที่ว่างสุดก่อน)
+    by="hash": กระจายตาม crc32 ของ program_url ได้ shard เดิมทุกครั้งไม่ว่า input จะเรียงอย่างไร
+    """
+    groups = [[] for _ in range(shards)]
+    if by == "hash":
+        for index, row in enumerate(rows):
+            groups[zlib.crc32(row["program_url"].encode("utf-8")) % shards].append((index, row))
+    else:
+        universities = {}
+        for index, row in enumerate(rows):
+            universities.setdefault(row["university"].strip(), []).append((index, row))
+        for members in sorted(universities.values(), key=len, reverse=True):
+            min(groups, key=len).extend(members)
+    return [sorted(group, key=lambda item: item[0]) for group in groups if group]
+
+
+def shard_path(output_dir, shard_id):
+    return os.path.join(output_dir, f"shard-{shard_id:03d}.jsonl")
+
+
+def run_shard(shard_id, rows, args, output_dir):
+    """
+    โปรเซส worker: ดึงแถวใน shard ที่ยังไม่มีใน checkpoint แล้วเขียนผลทั้ง shard ลงไฟล์
+    ไฟล์ถูกเขียนชื่อชั่วคราวก่อนแล้วค่อย rename ไฟล์ที่มีอยู่จึงหมายถึง shard เสร็จครบ
+    """
+    checkpoint = ckpt.Checkpoint(args.checkpoint)
+    shard_rows = [row for _, row in rows]
+    pending = ckpt.pending_rows(shard_rows, checkpoint, args.refresh_older_than)
+    results = asyncio.run(crawl(pending, sched.from_args(args), args.backend, args.base_url, checkpoint,
+                                block=not args.no_block))
+    records = {row["program_url"]: result for row, result in zip(pending, results)}
+    records.update(checkpoint.records())
+    checkpoint.close()
+
+    path = shard_path(output_dir, shard_id)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for index, row in rows:
+            record = records.get(row["program_url"]) or failed_row(row, None)
+            f.write(json.dumps({"index": index, "record": record}, ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def run_shards(shards, args, output_dir):
+    """
+    รัน shard ด้วยโปรเซสพร้อมกันไม่เกิน args.workers ตัว worker ที่จบด้วย exit code ไม่ใช่ 0
+    (crash, ถูก kill) จะถูกส่ง shard ใหม่ให้ worker ตัวใหม่ ไม่เกิน args.max_attempts ครั้งต่อ shard
+    คืนรายการ shard ที่ล้มเหลวทุกครั้ง
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = list(range(len(shards)))
+    attempts = [0] * len(shards)
+    running = {}
+    failed = []
+
+    while queue or running:
+        while queue and len(running) < args.workers:
+            shard_id = queue.pop(0)
+            attempts[shard_id] += 1
+            process = context.Process(target=run_shard, args=(shard_id, shards[shard_id], args, output_dir),
+                                      name=f"shard-{shard_id}")
+            process.start()
+            running[shard_id] = process
+            print(f"shard {shard_id}: เริ่ม {len(shards[shard_id])} แถว (ครั้งที่ {attempts[shard_id]}, pid {process.pid})")
+
+        time.sleep(0.2)
+        for shard_id, process in list(running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del running[shard_id]
+            if process.exitcode == 0 and os.path.exists(shard_path(output_dir, shard_id)):
+                print(f"shard {shard_id}: เสร็จ")
+            elif attempts[shard_id] < args.max_attempts:
+                print(f"shard {shard_id}: worker จบด้วย exit code {process.exitcode} ส่งให้ worker ใหม่")
+                queue.append(shard_id)
+            else:
+                print(f"shard {shard_id}: ล้มเหลว {attempts[shard_id]} ครั้ง ใช้ผลใน checkpoint เท่าที่มี")
+                failed.append(shard_id)
+    return failed
+
+
+def merge_shards(shards, failed, args, output_dir, total):
+    """รวมผลทุก shard เรียงตามลำดับเดิม shard ที่ล้มเหลวใช้ผลใน checkpoint หรือแถว failed_row"""
+    results = [None] * total
+    for shard_id in range(len(shards)):
+        if shard_id in failed:
+            continue
+        with open(shard_path(output_dir, shard_id), encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                results[item["index"]] = item["record"]
+
+    if failed:
+        checkpoint = ckpt.Checkpoint(args.checkpoint)
+        records = checkpoint.records()
+        checkpoint.close()
+        for shard_id in failed:
+            for index, row in shards[shard_id]:
+                results[index] = records.get(row["program_url"]) or failed_row(row, None)
+    return results
+
+
+def parquet_number(value, integer=False):
+    """ค่าตัวเลขจาก record เช่น 25500, "30", "1,200" ค่าว่างหรือ "-" (รอบที่ไม่เปิด) เป็น None"""
+    try:
+        number = float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+    if integer:
+        return int(number) if number.is_integer() else None
+    return number
+
+
+def write_output(path, results):
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # fee/term และจำนวนรับ r1..r4 เก็บเป็นตัวเลข คอลัมน์อื่นเป็นข้อความ
+        types = {"fee/term": pa.float64(), **{name: pa.int64() for name in ROUND_COLUMNS}}
+        columns = {}
+        for name in FIELDNAMES:
+            values = [result.get(name, "") for result in results]
+            if name in types:
+                integer = pa.types.is_integer(types[name])
+                columns[name] = pa.array([parquet_number(value, integer) for value in values], types[name])
+            else:
+                columns[name] = pa.array([str(value) for value in values], pa.string())
+        pq.write_table(pa.table(columns), path)
+        return
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(args):
+    with open(args.input, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    start = time.perf_counter()
+    shards = split_rows(rows, args.shards or args.workers, args.by)
+    os.makedirs(args.shard_dir, exist_ok=True)
+    # สร้าง/ย้าย schema ของ checkpoint ครั้งเดียวก่อนเริ่ม worker ไม่ให้หลายโปรเซส ALTER TABLE พร้อมกัน
+    ckpt.Checkpoint(args.checkpoint).close()
+    for shard_id in range(len(shards)):
+        if os.path.exists(shard_path(args.shard_dir, shard_id)):
+            os.remove(shard_path(args.shard_dir, shard_id))
+
+    failed = run_shards(shards, args, args.shard_dir)
+    results = merge_shards(shards, failed, args, args.shard_dir, len(rows))
+    write_output(args.output, results)
+
+    elapsed = time.perf_counter() - start
+    print(f"ดึง {len(rows)} หลักสูตร ด้วย {args.workers} โปรเซส {len(shards)} shard ใช้เวลา {elapsed:.1f} วินาที")
+    print(f"บันทึกไฟล์เสร็จ: {args.output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ดึงข้อมูลหลักสูตรด้วยหลายโปรเซส แต่ละโปรเซสมี browser ของตัวเอง")
+    parser.add_argument("--input", default="programs_engineering.csv")
+    parser.add_argument("--output", default="MainData.csv", help="ไฟล์ผลลัพธ์ .csv หรือ .parquet")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="จำนวนโปรเซสที่ทำงานพร้อมกัน (ค่าเริ่มต้น จำนวน core - 1)")
+    parser.add_argument("--shards", type=int,
+                        help="จำนวน shard (ค่าเริ่มต้น เท่ากับ --workers; มากกว่านี้ทำให้ shard ที่ต้องทำใหม่เล็กลง)")
+    parser.add_argument("--by", choices=["university", "hash"], default="university",
+                        help="แบ่ง shard ตามมหาวิทยาลัย หรือตาม hash ของ program_url")
+    parser.add_argument("--max-attempts", type=int, default=3, help="จำนวนครั้งที่ให้ worker ใหม่ทำ shard ที่ล้มเหลว")
+    parser.add_argument("--shard-dir", default="shards", help="โฟลเดอร์เก็บผลของแต่ละ shard")
+    parser.add_argument("--backend", choices=["http", "browser"], default="browser")
+    parser.add_argument("--base-url", help="ใช้แทน https://course.mytcas.com เช่น http://127.0.0.1:8000")
+    parser.add_argument("--no-block", action="store_true", help="ไม่บล็อกรูป ฟอนต์ CSS ใน browser")
+    sched.add_arguments(parser)
+    ckpt.add_arguments(parser, "MainData.checkpoint.db")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+DETAIL_COLUMNS = {
+    'university': 'มหาวิทยาลัย',
+    'faculty': 'คณะ',
+    'program_name': 'หลักสูตร',
+    'fee/term': 'ค่าเทอม',
+    'r1': 'รอบ1',
+    'r2': 'รอบ2',
+    'r3': 'รอบ3',
+    'r4': 'รอบ4',
+    'total_admission': 'รวม',
+    'university_type': 'ประเภท'
+}
+
+def format_baht(values):
+    """Vectorized '฿12,345' formatting; missing fees show as '-'"""
+    values = pd.Series(values)
+    amounts = values.round().astype('Int64').astype(str)
+    amounts = amounts.str.replace(r'(\d)(?=(\d{3})+$)', r'\1,', regex=True)
+    return ('฿' + amounts).where(values.notna(), '-')
+
+def display_table(df, columns=None):
+    """Select, format and rename columns for st.dataframe; call on the rows that will be shown only"""
+    columns = columns or list(DETAIL_COLUMNS)
+    table = df[columns].copy()
+    if 'fee/term' in table:
+        table['fee/term'] = format_baht(table['fee/term']).to_numpy()
+    return table.rename(columns=DETAIL_COLUMNS)
+
+class SortIndex:
+    """
+    One stable argsort per column and direction over the whole dataset, built on first use.
+    Sorting a filtered subset is then an O(n) membership pass over the global order
+    rather than a sort of the subset. Equal values keep their original row order in both
+    directions (like nsmallest/nlargest with keep='first'); missing values stay last.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.size = len(df)
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def _order(self, column, descending):
+        with self._lock:
+            if (column, descending) not in self._orders:
+                values = self.df[column]
+                missing = values.isna().to_numpy()
+                present = np.flatnonzero(~missing)
+                if pd.api.types.is_numeric_dtype(values):
+                    keys = values.to_numpy(dtype=float)[present]
+                else:
+                    # dense ranks, so strings can be negated like numbers for the descending order
+                    keys = np.unique(values.astype(str).to_numpy()[present], return_inverse=True)[1]
+                present = present[np.argsort(-keys if descending else keys, kind='stable')]
+                self._orders[column, descending] = (present, np.flatnonzero(missing))
+            return self._orders[column, descending]
+
+    def sorted_rows(self, rows, column, descending=False):
+        """Row positions from rows, ordered by column"""
+        member = np.zeros(self.size, dtype=bool)
+        member[rows] = True
+        present, missing = self._order(column, descending)
+        return np.concatenate([present[member[present]], missing[member[missing]]])
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+def page_slice(rows, page, page_size):
+    """Row positions for a 1-based page number"""
+    start = (page - 1) * page_size
+    return rows[start:start + page_size]
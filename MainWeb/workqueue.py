@@ -0,0 +1,363 @@
+"""
+คิวงานภายนอกแบบ lease/ack ให้ crawler หลายเครื่องดึงหลักสูตรจากคิวเดียวกัน
+
+    python workqueue.py enqueue --queue sqlite:jobs.db --input programs_engineering.csv
+    python workqueue.py work --queue sqlite:jobs.db --worker-id a      # รันกี่ตัวก็ได้ กี่เครื่องก็ได้
+    python workqueue.py status --queue sqlite:jobs.db
+    python workqueue.py export --queue sqlite:jobs.db --output MainData.csv
+
+    --queue redis://host:6379/0   ใช้ Redis (หรือ server ที่พูด Redis protocol) แทนไฟล์ SQLite (ต้องมีแพ็กเกจ redis)
+
+worker ยืม (lease) งานไปครั้งละ batch พร้อมเวลาหมดอายุ และต่ออายุเป็นระยะระหว่างทำงาน
+ถ้า worker ตายหรือหายไป lease จะหมดอายุ แล้วงานจะกลับเข้าคิวให้ worker อื่นในการ lease ครั้งถัดไป
+งานที่ล้มเหลวเกิน max_attempts ครั้งจะถูกย้ายไปสถานะ dead
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import socket
+import sqlite3
+import time
+
+import scheduler as sched
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 5
+
+
+class Job:
+    def __init__(self, job_id, payload, attempts):
+        self.id = job_id
+        self.payload = payload
+        self.attempts = attempts
+
+
+class SQLiteQueue:
+    """
+    คิวในไฟล์ SQLite สำหรับเครื่องเดียว (หลายโปรเซสใช้ไฟล์เดียวกันได้)
+    lease ทำใน transaction แบบ BEGIN IMMEDIATE จึงไม่มีงานไหนถูกยืมซ้อนกันสองที่
+    """
+
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'queued',"
+            " owner TEXT,"
+            " lease_expires REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " updated REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+
+    def put(self, jobs):
+        """เพิ่มงาน [(id, payload)] งานที่มี id อยู่แล้วจะไม่ถูกเพิ่มซ้ำ คืนจำนวนที่เพิ่มจริง"""
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (id, payload, updated) VALUES (?, ?, ?)",
+            [(job_id, json.dumps(payload, ensure_ascii=False), time.time()) for job_id, payload in jobs],
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def _requeue_expired(self, now):
+        self.conn.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'dead' ELSE 'queued' END,"
+            " owner = NULL, lease_expires = NULL, error = COALESCE(error, 'lease expired'), updated = ?"
+            " WHERE state = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now),
+        )
+
+    def lease(self, worker_id, count=1, ttl=LEASE_SECONDS):
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._requeue_expired(now)
+            rows = self.conn.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE state = 'queued' ORDER BY rowid LIMIT ?", (count,)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1,"
+                " updated = ? WHERE id = ?",
+                [(worker_id, now + ttl, now, job_id) for job_id, _, _ in rows],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [Job(job_id, json.loads(payload), attempts + 1) for job_id, payload, attempts in rows]
+
+    def extend(self, worker_id, job_ids, ttl=LEASE_SECONDS):
+        """ต่ออายุ lease ของงานที่ worker นี้ยังถืออยู่"""
+        self.conn.executemany(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            [(time.time() + ttl, job_id, worker_id) for job_id in job_ids],
+        )
+
+    def ack(self, worker_id, job_id, result):
+        """
+        บันทึกผลและปิดงาน เฉพาะเมื่อ worker_id ยังถือ lease อยู่ (ยังไม่ถูกคืนเข้าคิวหรือให้ worker อื่น)
+        คืน False ถ้าเสีย lease ไปแล้ว
+        """
+        cursor = self.conn.execute(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, owner = NULL, lease_expires = NULL,"
+            " updated = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, worker_id, job_id, error):
+        """คืนงานเข้าคิว หรือย้ายไป dead ถ้าลองครบ max_attempts แล้ว; คืน False ถ้าเสีย lease ไปแล้ว"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'dead' ELSE 'queued' END,"
+            " error = ?, owner = NULL, lease_expires = NULL, updated = ?"
+            " WHERE id = ? AND owner = ? AND state = 'leased'",
+            (self.max_attempts, str(error), time.time(), job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def stats(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._requeue_expired(time.time())
+        self.conn.execute("COMMIT")
+        counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return {state: counts.get(state, 0) for state in ("queued", "leased", "done", "dead")}
+
+    def results(self):
+        cursor = self.conn.execute("SELECT id, result FROM jobs WHERE state = 'done'")
+        return {job_id: json.loads(result) for job_id, result in cursor}
+
+    def close(self):
+        self.conn.close()
+
+
+# lease แบบ atomic ฝั่ง server: คืนงานที่ lease หมดอายุเข้าคิว (หรือ dead) แล้วยืมงานจากหัวคิว
+LEASE_SCRIPT = """
+local now, ttl, count, max_attempts = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[5], id)
+    if tonumber(redis.call('HGET', KEYS[4], id) or '0') >= max_attempts then
+        redis.call('HSET', KEYS[6], id, 'lease expired')
+    else
+        redis.call('RPUSH', KEYS[1], id)
+    end
+end
+local leased = {}
+for i = 1, count do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then break end
+    redis.call('ZADD', KEYS[2], now + ttl, id)
+    redis.call('HSET', KEYS[5], id, ARGV[5])
+    local attempts = redis.call('HINCRBY', KEYS[4], id, 1)
+    table.insert(leased, {id, redis.call('HGET', KEYS[3], id), attempts})
+end
+return leased
+"""
+
+# ack/nack ทำได้เฉพาะ worker ที่ยังถือ lease อยู่ (owner ตรงกันและยังอยู่ใน :leases)
+ACK_SCRIPT = """
+if redis.call('HGET', KEYS[5], ARGV[1]) ~= ARGV[2] or not redis.call('ZSCORE', KEYS[2], ARGV[1]) then return 0 end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[5], ARGV[1])
+redis.call('HDEL', KEYS[6], ARGV[1])
+redis.call('HSET', KEYS[7], ARGV[1], ARGV[3])
+return 1
+"""
+
+NACK_SCRIPT = """
+if redis.call('HGET', KEYS[5], ARGV[1]) ~= ARGV[4] or redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then return 0 end
+redis.call('HDEL', KEYS[5], ARGV[1])
+if tonumber(redis.call('HGET', KEYS[4], ARGV[1]) or '0') >= tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[6], ARGV[1], ARGV[2])
+else
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+class RedisQueue:
+    """
+    คิวบน Redis protocol สำหรับหลายเครื่อง ทุกขั้นที่ต้อง atomic (lease, nack) รันเป็น Lua script บน server
+    key: <prefix>:queue (list), :leases (zset id -> เวลาหมดอายุ), :payloads, :attempts, :owners,
+    :dead, :results (hash)
+    """
+
+    def __init__(self, url, prefix="mytcas", max_attempts=MAX_ATTEMPTS):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.path = url
+        self.max_attempts = max_attempts
+        self.keys = [f"{prefix}:{name}" for name in ("queue", "leases", "payloads", "attempts", "owners", "dead")]
+        self.results_key = f"{prefix}:results"
+        self._lease = self.client.register_script(LEASE_SCRIPT)
+        self._ack = self.client.register_script(ACK_SCRIPT)
+        self._nack = self.client.register_script(NACK_SCRIPT)
+
+    def put(self, jobs):
+        queue, _, payloads, *_ = self.keys
+        added = 0
+        for job_id, payload in jobs:
+            if self.client.hsetnx(payloads, job_id, json.dumps(payload, ensure_ascii=False)):
+                self.client.rpush(queue, job_id)
+                added += 1
+        return added
+
+    def lease(self, worker_id, count=1, ttl=LEASE_SECONDS):
+        leased = self._lease(keys=self.keys, args=[time.time(), ttl, count, self.max_attempts, worker_id])
+        return [Job(job_id, json.loads(payload), int(attempts)) for job_id, payload, attempts in leased]
+
+    def extend(self, worker_id, job_ids, ttl=LEASE_SECONDS):
+        _, leases, _, _, owners, _ = self.keys
+        expires = time.time() + ttl
+        for job_id in job_ids:
+            if self.client.hget(owners, job_id) == worker_id:
+                self.client.zadd(leases, {job_id: expires}, xx=True)
+
+    def ack(self, worker_id, job_id, result):
+        return bool(self._ack(keys=[*self.keys, self.results_key],
+                              args=[job_id, worker_id, json.dumps(result, ensure_ascii=False)]))
+
+    def nack(self, worker_id, job_id, error):
+        return bool(self._nack(keys=self.keys, args=[job_id, str(error), self.max_attempts, worker_id]))
+
+    def stats(self):
+        # lease ว่าง 0 งาน เพื่อให้ server คืนงานที่ lease หมดอายุก่อนนับ
+        self.lease("stats", count=0)
+        queue, leases, *_ = self.keys
+        return {
+            "queued": self.client.llen(queue),
+            "leased": self.client.zcard(leases),
+            "done": self.client.hlen(self.results_key),
+            "dead": self.client.hlen(self.keys[5]),
+        }
+
+    def results(self):
+        return {job_id: json.loads(result) for job_id, result in self.client.hgetall(self.results_key).items()}
+
+    def close(self):
+        self.client.close()
+
+
+def open_queue(url, max_attempts=MAX_ATTEMPTS):
+    """sqlite:<ไฟล์> หรือ redis://host:port/db"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisQueue(url, max_attempts=max_attempts)
+    return SQLiteQueue(url.split(":", 1)[1] if url.startswith("sqlite:") else url, max_attempts)
+
+
+async def keep_alive(queue, worker_id, job_ids, ttl):
+    """ต่ออายุ lease ทุก ttl/3 วินาทีระหว่างที่ batch ยังทำอยู่"""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        queue.extend(worker_id, job_ids, ttl)
+
+
+async def work(queue, args, worker_id):
+    """
+    วน lease งานครั้งละ batch -> ดึงด้วย crawl.crawl -> ack ผลที่ได้ / nack แถวที่ล้มเหลว
+    จบเมื่อคิวว่าง (ถ้ามีงานที่คนอื่นยืมอยู่จะรอจนกว่าจะเสร็จหรือ lease หมดอายุกลับเข้าคิว)
+    """
+    from crawl import crawl
+
+    scheduler = sched.from_args(args)
+    batch_size = args.batch or scheduler.max_concurrency * 2
+    done = failed = lost = 0
+    while True:
+        jobs = queue.lease(worker_id, batch_size, args.lease_seconds)
+        if not jobs:
+            if not queue.stats()["leased"]:
+                break
+            await asyncio.sleep(min(5, args.lease_seconds / 4))
+            continue
+
+        rows = [job.payload["row"] for job in jobs]
+        heartbeat = asyncio.create_task(keep_alive(queue, worker_id, [job.id for job in jobs], args.lease_seconds))
+        try:
+            results = await crawl(rows, scheduler, args.backend, args.base_url, block=not args.no_block, on_error=None)
+        finally:
+            heartbeat.cancel()
+
+        for job, result in zip(jobs, results):
+            if result is None:
+                kept = queue.nack(worker_id, job.id, "scrape failed")
+                failed += kept
+            else:
+                kept = queue.ack(worker_id, job.id, result)
+                done += kept
+            if not kept:
+                # lease หมดอายุระหว่างดึง งานถูกคืนเข้าคิวหรือ worker อื่นรับไปแล้ว ผลของรอบนี้จึงถูกทิ้ง
+                lost += 1
+                print(f"[{worker_id}] เสีย lease ของ {job.id} ไม่บันทึกผลรอบนี้")
+        print(f"[{worker_id}] สำเร็จ {done} งาน, ล้มเหลว {failed} งาน, เสีย lease {lost} งาน, คิว {queue.stats()}")
+
+
+def enqueue(queue, path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    added = queue.put((row["program_url"], {"index": index, "row": row}) for index, row in enumerate(rows))
+    print(f"เพิ่ม {added} งานจาก {len(rows)} แถว ({len(rows) - added} งานมีอยู่แล้ว)")
+
+
+def export(queue, input_path, output_path):
+    """เขียนผลที่ ack แล้วเป็น MainData.csv เรียงตามลำดับใน input"""
+    from crawl import FIELDNAMES
+
+    with open(input_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    results = queue.results()
+    missing = [row["program_url"] for row in rows if row["program_url"] not in results]
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(results[row["program_url"]] for row in rows if row["program_url"] in results)
+    print(f"บันทึก {len(rows) - len(missing)} แถวลง {output_path}" + (f" (ยังไม่มีผล {len(missing)} แถว)" if missing else ""))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="คิวงาน lease/ack สำหรับรัน crawler หลายตัวหลายเครื่อง")
+    parser.add_argument("command", choices=["enqueue", "work", "status", "export"])
+    parser.add_argument("--queue", default="sqlite:jobs.db", help="sqlite:<ไฟล์> หรือ redis://host:port/db")
+    parser.add_argument("--input", default="programs_engineering.csv")
+    parser.add_argument("--output", default="MainData.csv")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--batch", type=int, help="จำนวนงานที่ lease ต่อครั้ง (ค่าเริ่มต้น 2 เท่าของ max concurrency)")
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS,
+                        help="อายุ lease ถ้า worker เงียบเกินนี้งานจะกลับเข้าคิว")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--backend", choices=["http", "browser"], default="http")
+    parser.add_argument("--base-url", help="ใช้แทน https://course.mytcas.com เช่น http://127.0.0.1:8000")
+    parser.add_argument("--no-block", action="store_true")
+    sched.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main(args):
+    queue = open_queue(args.queue, args.max_attempts)
+    try:
+        if args.command == "enqueue":
+            enqueue(queue, args.input)
+        elif args.command == "work":
+            asyncio.run(work(queue, args, args.worker_id))
+        elif args.command == "status":
+            print(queue.stats())
+        else:
+            export(queue, args.input, args.output)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main(parse_args())